@@ -3,10 +3,15 @@
 专注于错误处理和重试机制
 """
 import json
+import os
+import random
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import Callable, List, Dict, Optional, Any
 import traceback
 
 from ..services.gemini_service import GeminiService
@@ -17,21 +22,80 @@ from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeEl
 
 console = Console()
 
+def _keyword_pattern(*keywords: str) -> "re.Pattern[str]":
+    """将关键字列表编译为一个不区分大小写的正则，一次扫描即可判断是否包含任一关键字"""
+    return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+
+
 class SimpleBatchProcessor:
     """简单但健壮的批量处理器 - 专注于可靠性"""
     
-    def __init__(self, config: Config):
+    # 错误分类关键字，类定义时编译一次
+    # 网络相关错误 - 应该重试
+    _NETWORK_ERROR_RE = _keyword_pattern(
+        "network", "timeout", "connection", "503", "502", "504",
+        "temporary failure", "try again", "upload failed", "socket"
+    )
+    # API限额错误 - 短暂重试
+    _QUOTA_ERROR_RE = _keyword_pattern("quota", "rate limit", "429")
+    # 文件相关错误、API认证错误、Gemini API 特定错误 - 不重试
+    _PERMANENT_ERROR_RE = _keyword_pattern(
+        "file not found", "permission denied", "invalid format",
+        "unsupported format", "corrupted", "access denied", "no such file",
+        "invalid api key", "authentication", "unauthorized", "401", "403",
+        "invalid video", "video too large", "unsupported video format"
+    )
+    
+    # 重试退避参数（秒）：base * 2^attempt 加上 [0, base) 的随机抖动，上限 max
+    _BACKOFF_BASE = 1.0
+    _BACKOFF_MAX = 16.0
+    
+    # API限额熔断器：窗口内有多个不同视频出现限额错误即熔断（单个视频自身的重试不计入），
+    # 冷却后只放行一个探测请求
+    _CB_CLOSED = "closed"
+    _CB_OPEN = "open"
+    _CB_HALF_OPEN = "half_open"
+    _CB_QUOTA_THRESHOLD = 2  # 不同视频数
+    _CB_QUOTA_WINDOW = 60.0
+    
+    def __init__(self, config: Config, sleep_fn: Callable[[float], None] = time.sleep,
+                 state_flush_interval: float = 0.1, circuit_cooldown: float = 60.0,
+                 state_dir: Optional[Path] = None):
         self.config = config
         self.gemini_service = GeminiService(config)
         self.template_manager = TemplateManager(config.data)
+        # 状态文件目录，默认为当前工作目录
+        self.state_dir = Path(state_dir) if state_dir is not None else None
         self.state_file = None
+        # 当前批次的处理状态（与状态文件内容一致）
+        self.state: Optional[Dict[str, Any]] = None
+        # 状态文件由后台线程写入：interval 内的多次更新合并为一次写入
+        self.state_flush_interval = state_flush_interval
+        self._state_lock = threading.Lock()
+        # 序列化和写文件整体串行：并发的 flush 不会互相截断临时文件，也不会用旧状态覆盖新状态
+        self._state_write_lock = threading.Lock()
+        self._state_dirty = threading.Event()
+        self._state_writer_stop = threading.Event()
+        self._state_writer: Optional[threading.Thread] = None
+        # 重试退避的等待函数可注入（测试中替换为不等待的记录函数）
+        self._sleep = sleep_fn
+        self._backoff_history: List[float] = []
+        # 熔断器状态
+        self.circuit_cooldown = circuit_cooldown
+        self._cb_lock = threading.Lock()
+        self._cb_state = self._CB_CLOSED
+        self._cb_opened_at = 0.0
+        self._cb_probe_in_flight = False
+        # 窗口内最近一次限额错误的时间，按视频区分
+        self._quota_error_times: Dict[str, float] = {}
         
     def process_directory(self, 
                          input_dir: str, 
                          template_name: str = "chinese_transcript",
                          output_dir: Optional[str] = None,
                          skip_existing: bool = False,
-                         max_retries: int = 3) -> Dict[str, Any]:
+                         max_retries: int = 3,
+                         max_workers: int = 1) -> Dict[str, Any]:
         """
         处理目录中的所有视频文件
         
@@ -41,6 +105,7 @@ class SimpleBatchProcessor:
             output_dir: 输出目录 
             skip_existing: 是否跳过已存在的输出文件
             max_retries: 最大重试次数
+            max_workers: 并发处理的视频数（默认1，逐个处理）
             
         Returns:
             处理结果统计
@@ -56,7 +121,8 @@ class SimpleBatchProcessor:
         
         # 2. 创建状态文件
         batch_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        self.state_file = Path(f"{batch_id}_state.json")
+        state_name = f"{batch_id}_state.json"
+        self.state_file = self.state_dir / state_name if self.state_dir is not None else Path(state_name)
         
         # 3. 初始化统计
         stats = {
@@ -68,52 +134,75 @@ class SimpleBatchProcessor:
             "start_time": datetime.now().isoformat(),
             "results": []
         }
+        self.state = stats
         
-        # 4. 开始处理 - 使用进度条
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-            TimeElapsedColumn(),
-            console=console
-        ) as progress:
-            
-            task = progress.add_task("处理视频中...", total=len(video_files))
+        self._start_state_writer()
+        try:
+            # 4. 开始处理 - 使用进度条
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+                TimeElapsedColumn(),
+                console=console
+            ) as progress:
             
-            for i, video_file in enumerate(video_files):
-                progress.update(task, description=f"处理: {video_file.name}")
+                task = progress.add_task("处理视频中...", total=len(video_files))
                 
-                # 处理单个视频 (带重试和错误隔离)
-                result = self._process_single_video_safe(
-                    video_file, 
-                    template_name, 
-                    output_dir,
-                    skip_existing,
-                    max_retries
-                )
+                def process(video_file: Path):
+                    progress.update(task, description=f"处理: {video_file.name}")
+                    # 处理单个视频 (带重试和错误隔离)
+                    return video_file, self._process_single_video_safe(
+                        video_file, 
+                        template_name, 
+                        output_dir,
+                        skip_existing,
+                        max_retries
+                    )
                 
-                # 更新统计
-                if result["status"] == "success":
-                    stats["success"] += 1
-                    console.print(f"✅ [{i+1}/{len(video_files)}] {video_file.name}")
-                elif result["status"] == "skipped":
-                    stats["skipped"] += 1
-                    console.print(f"⏭️  [{i+1}/{len(video_files)}] {video_file.name} (已存在)")
+                # 并发处理时按完成顺序汇总结果；默认逐个处理
+                executor = None
+                if max_workers > 1:
+                    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-video")
+                    futures = [executor.submit(process, video_file) for video_file in video_files]
+                    outcomes = (future.result() for future in as_completed(futures))
                 else:
-                    stats["failed"] += 1
-                    console.print(f"❌ [{i+1}/{len(video_files)}] {video_file.name} - {result['error']}")
+                    outcomes = map(process, video_files)
                 
-                stats["results"].append(result)
+                try:
+                    for i, (video_file, result) in enumerate(outcomes):
+                        # 更新统计（与后台写入线程的序列化互斥）
+                        with self._state_lock:
+                            if result["status"] == "success":
+                                stats["success"] += 1
+                            elif result["status"] == "skipped":
+                                stats["skipped"] += 1
+                            else:
+                                stats["failed"] += 1
+                            stats["results"].append(result)
+                
+                        if result["status"] == "success":
+                            console.print(f"✅ [{i+1}/{len(video_files)}] {video_file.name}")
+                        elif result["status"] == "skipped":
+                            console.print(f"⏭️  [{i+1}/{len(video_files)}] {video_file.name} (已存在)")
+                        else:
+                            console.print(f"❌ [{i+1}/{len(video_files)}] {video_file.name} - {result['error']}")
                 
-                # 立即保存状态 (关键：防止数据丢失)
-                self._save_state(stats)
+                        # 标记状态已更新，由后台线程合并写入 (防止数据丢失)
+                        self._state_dirty.set()
                 
-                progress.update(task, advance=1)
+                        progress.update(task, advance=1)
+                finally:
+                    if executor is not None:
+                        executor.shutdown(wait=True, cancel_futures=True)
         
-        # 5. 完成处理
-        stats["end_time"] = datetime.now().isoformat()
-        self._save_state(stats)
+            # 5. 完成处理
+            with self._state_lock:
+                stats["end_time"] = datetime.now().isoformat()
+        finally:
+            # 停止后台写入并同步保存最终状态（处理中断时也会保存已完成的结果）
+            self._stop_state_writer()
         
         return stats
     
@@ -150,6 +239,11 @@ class SimpleBatchProcessor:
             # 重试循环 - 处理网络中断和临时错误
             last_error = None
             for attempt in range(max_retries + 1):
+                # 限额熔断期间快速失败，不再调用 API
+                if not self._circuit_allows_request():
+                    last_error = Exception("API quota circuit open - 限额熔断中，暂停调用 API")
+                    break
+                
                 result["attempts"] = attempt + 1
                 
                 try:
@@ -162,6 +256,7 @@ class SimpleBatchProcessor:
                     )
                     
                     # 成功处理
+                    self._record_api_success()
                     result["status"] = "success"
                     result["output_path"] = getattr(processing_result, 'output_path', 
                                                    self._get_expected_output_path(video_file, output_dir))
@@ -171,14 +266,26 @@ class SimpleBatchProcessor:
                     last_error = e
                     error_str = str(e)
                     
+                    # 持续的限额错误会打开熔断器，此时不再重试
+                    if self._QUOTA_ERROR_RE.search(error_str):
+                        if self._record_quota_error(str(video_file)):
+                            console.print(f"[yellow]⚡ API限额持续超限，暂停调用 {self.circuit_cooldown:.0f} 秒: {video_file.name}[/yellow]")
+                            break
+                    else:
+                        self._record_api_failure()
+                    
                     # 错误分类 - 决定是否重试
                     should_retry = self._should_retry_error(error_str, attempt, max_retries)
                     
                     if should_retry:
-                        # 指数退避策略
-                        sleep_time = min(2 ** attempt, 16)  # 最大16秒
-                        console.print(f"⚠️  网络错误，{sleep_time}秒后第{attempt+2}次重试: {video_file.name}")
-                        time.sleep(sleep_time)
+                        # 带抖动的指数退避：避免同时受限的请求同步重试
+                        sleep_time = min(
+                            self._BACKOFF_MAX,
+                            self._BACKOFF_BASE * (2 ** attempt) + random.uniform(0, self._BACKOFF_BASE)
+                        )
+                        console.print(f"⚠️  网络错误，{sleep_time:.1f}秒后第{attempt+2}次重试: {video_file.name}")
+                        self._backoff_history.append(sleep_time)
+                        self._sleep(sleep_time)
                         continue
                     else:
                         # 不可重试的错误，直接失败
@@ -202,41 +309,75 @@ class SimpleBatchProcessor:
         
         这是错误处理的核心：区分临时错误和永久错误
         """
-        error_lower = error_str.lower()
-        
         # 网络相关错误 - 应该重试
-        network_keywords = [
-            "network", "timeout", "connection", "503", "502", "504", 
-            "temporary failure", "try again", "upload failed", "socket"
-        ]
-        if any(keyword in error_lower for keyword in network_keywords):
+        if self._NETWORK_ERROR_RE.search(error_str):
             return attempt < max_retries
         
         # API限额错误 - 短暂重试
-        if "quota" in error_lower or "rate limit" in error_lower or "429" in error_lower:
+        if self._QUOTA_ERROR_RE.search(error_str):
             return attempt < 2  # 最多重试2次
         
-        # 文件相关错误 - 不重试
-        permanent_keywords = [
-            "file not found", "permission denied", "invalid format", 
-            "unsupported format", "corrupted", "access denied", "no such file"
-        ]
-        if any(keyword in error_lower for keyword in permanent_keywords):
-            return False
-        
-        # API认证错误 - 不重试
-        auth_keywords = ["invalid api key", "authentication", "unauthorized", "401", "403"]
-        if any(keyword in error_lower for keyword in auth_keywords):
-            return False
-        
-        # Gemini API 特定错误 - 不重试
-        gemini_keywords = ["invalid video", "video too large", "unsupported video format"]
-        if any(keyword in error_lower for keyword in gemini_keywords):
+        # 文件、认证和 Gemini API 特定的永久错误 - 不重试
+        if self._PERMANENT_ERROR_RE.search(error_str):
             return False
         
         # 其他未知错误 - 保守重试1次
         return attempt < 1
     
+    def _circuit_allows_request(self) -> bool:
+        """
+        熔断器是否允许调用 API
+        
+        冷却结束后转为半开，只放行一个探测请求；探测结束前其他调用方仍快速失败。
+        """
+        with self._cb_lock:
+            if self._cb_state == self._CB_CLOSED:
+                return True
+            if self._cb_state == self._CB_OPEN:
+                if time.monotonic() - self._cb_opened_at <= self.circuit_cooldown:
+                    return False
+                self._cb_state = self._CB_HALF_OPEN
+            if self._cb_probe_in_flight:
+                return False
+            self._cb_probe_in_flight = True
+            return True
+    
+    def _record_quota_error(self, video_key: str) -> bool:
+        """记录一次限额错误，返回熔断器是否因此打开"""
+        now = time.monotonic()
+        with self._cb_lock:
+            if self._cb_state == self._CB_HALF_OPEN:
+                # 探测请求仍然超限，重新熔断
+                self._open_circuit(now)
+                return True
+            
+            self._quota_error_times = {key: t for key, t in self._quota_error_times.items()
+                                       if now - t <= self._CB_QUOTA_WINDOW}
+            self._quota_error_times[video_key] = now
+            if len(self._quota_error_times) >= self._CB_QUOTA_THRESHOLD:
+                self._open_circuit(now)
+                return True
+            return False
+    
+    def _record_api_success(self):
+        """API 调用成功，关闭熔断器"""
+        with self._cb_lock:
+            self._cb_state = self._CB_CLOSED
+            self._cb_probe_in_flight = False
+            self._quota_error_times.clear()
+    
+    def _record_api_failure(self):
+        """非限额错误：不改变熔断状态，但结束当前探测，允许下一个调用方重新探测"""
+        with self._cb_lock:
+            self._cb_probe_in_flight = False
+    
+    def _open_circuit(self, now: float):
+        """打开熔断器并开始冷却计时（调用方需持有 _cb_lock）"""
+        self._cb_state = self._CB_OPEN
+        self._cb_opened_at = now
+        self._cb_probe_in_flight = False
+        self._quota_error_times.clear()
+    
     def _scan_video_files(self, input_dir: str) -> List[Path]:
         """扫描目录中的视频文件"""
         supported_formats = ['.mp4', '.mov', '.avi', '.mkv', '.webm']
@@ -265,11 +406,49 @@ class SimpleBatchProcessor:
         output_name = f"{video_file.stem}_lesson.md"
         return str(output_path / output_name)
     
-    def _save_state(self, stats: Dict[str, Any]):
-        """保存处理状态到JSON文件"""
+    def flush_state(self):
+        """立即将当前处理状态同步写入状态文件"""
+        if self.state is None:
+            return
+        with self._state_write_lock:
+            with self._state_lock:
+                data = json.dumps(self.state, indent=2, ensure_ascii=False)
+            self._save_state(data)
+    
+    def _start_state_writer(self):
+        """启动后台状态写入线程"""
+        self._state_dirty.clear()
+        self._state_writer_stop.clear()
+        self._state_writer = threading.Thread(
+            target=self._state_writer_loop, name="batch-state-writer", daemon=True
+        )
+        self._state_writer.start()
+    
+    def _stop_state_writer(self):
+        """停止后台写入线程，并同步写入最终状态"""
+        self._state_writer_stop.set()
+        self._state_dirty.set()  # 唤醒等待中的写入线程
+        if self._state_writer is not None:
+            self._state_writer.join()
+            self._state_writer = None
+        self.flush_state()
+    
+    def _state_writer_loop(self):
+        """状态有更新时等待 state_flush_interval 合并后续更新，再写入一次"""
+        while not self._state_writer_stop.is_set():
+            self._state_dirty.wait()
+            if self._state_writer_stop.wait(self.state_flush_interval):
+                return  # 停止时由 _stop_state_writer 写入最终状态
+            self._state_dirty.clear()
+            self.flush_state()
+    
+    def _save_state(self, data: str):
+        """保存处理状态到JSON文件（先写临时文件再原子替换，中断时不会留下半写的状态文件）"""
         if self.state_file:
             try:
-                with open(self.state_file, 'w', encoding='utf-8') as f:
-                    json.dump(stats, f, indent=2, ensure_ascii=False)
+                tmp_file = self.state_file.with_name(self.state_file.name + ".tmp")
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_file, self.state_file)
             except Exception as e:
                 console.print(f"[yellow]⚠️  状态保存失败: {e}[/yellow]")
@@ -8,6 +8,7 @@ Service Factory for CLI
 - 资源清理
 """
 
+import copy
 import logging
 from typing import Optional, Any, Dict, TYPE_CHECKING
 from pathlib import Path
@@ -36,6 +37,8 @@ class ServiceFactory:
     def __init__(self):
         """初始化服务工厂"""
         self._config_cache: Dict[str, 'Config'] = {}
+        # 原始配置文件内容缓存（应用覆盖参数前），同一文件只解析一次
+        self._raw_config_cache: Dict[str, Dict[str, Any]] = {}
         self._service_cache: Dict[str, Any] = {}
         self._initialized = True
     
@@ -63,8 +66,8 @@ class ServiceFactory:
         
         try:
             # 加载基础配置
-            from ...config import load_config, Config
-            config_dict = load_config(config_file)
+            from ...config import Config
+            config_dict = self._load_raw_config(config_file)
             
             # 应用覆盖参数
             self._apply_overrides(config_dict, overrides)
@@ -295,9 +298,31 @@ class ServiceFactory:
         
         # 清空缓存
         self._config_cache.clear()
+        self._raw_config_cache.clear()
         self._service_cache.clear()
         logger.info("Cleared all service factory caches")
     
+    def _load_raw_config(self, config_file: Optional[str]) -> Dict[str, Any]:
+        """
+        读取配置文件，按路径和修改时间缓存解析结果
+        
+        不同的覆盖参数会生成不同的配置缓存键，但底层YAML文件只需解析一次；
+        返回深拷贝，覆盖参数不会污染缓存。
+        """
+        from ...config import load_config
+        
+        raw_key = self._create_cache_key(config_file, {})
+        if config_file:
+            try:
+                raw_key = f"{raw_key}_{Path(config_file).stat().st_mtime_ns}"
+            except OSError:
+                # 文件不存在时交给 load_config 抛出明确的错误
+                return load_config(config_file)
+        
+        if raw_key not in self._raw_config_cache:
+            self._raw_config_cache[raw_key] = load_config(config_file)
+        return copy.deepcopy(self._raw_config_cache[raw_key])
+    
     def _create_cache_key(self, config_file: Optional[str], overrides: Dict[str, Any]) -> str:
         """创建配置缓存键"""
         # 使用配置文件路径和覆盖参数的哈希作为键
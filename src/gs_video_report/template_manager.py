@@ -3,11 +3,77 @@ Template management for gs_videoReport
 
 This module handles loading, validating, and rendering prompt templates.
 """
+import logging
+import os
 import yaml
-from pathlib import Path
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
 from string import Template
 
+logger = logging.getLogger(__name__)
+
+# Prefer the libyaml-backed loader when available
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_MAX_READ_WORKERS = 8
+
+# Project root used to resolve relative template paths (resolved once at import)
+_MODULE_BASE = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _read_template_file(template_file: str) -> Tuple[str, Union[bytes, Exception]]:
+    """Read a template file, returning the error instead of raising it."""
+    try:
+        with open(template_file, 'rb') as f:
+            return template_file, f.read()
+    except OSError as e:
+        return template_file, e
+
+
+class _MissingParam:
+    """Placeholder that renders back to its original ``$name``/``${name}`` form."""
+    
+    __slots__ = ('key',)
+    
+    def __init__(self, key: str):
+        self.key = key
+    
+    def __str__(self) -> str:
+        return '$' + self.key
+    
+    def __format__(self, format_spec: str) -> str:
+        return '${' + self.key + '}'
+
+
+class _SafeDict(dict):
+    """Mapping for str.format_map that leaves unknown placeholders intact."""
+    
+    def __missing__(self, key: str) -> _MissingParam:
+        return _MissingParam(key)
+
+
+def _to_format_string(prompt: str) -> str:
+    """
+    Convert a string.Template prompt into an equivalent str.format string.
+    
+    Literal braces are escaped, ``$$`` becomes ``$``, ``$name`` becomes
+    ``{name!s}`` and ``${name}`` becomes ``{name}``, so ``format_map`` with a
+    ``_SafeDict`` renders the same text as ``Template.safe_substitute``.
+    """
+    parts = []
+    last = 0
+    for match in Template.pattern.finditer(prompt):
+        parts.append(prompt[last:match.start()].replace('{', '{{').replace('}', '}}'))
+        if match.group('named') is not None:
+            parts.append('{' + match.group('named') + '!s}')
+        elif match.group('braced') is not None:
+            parts.append('{' + match.group('braced') + '}')
+        else:
+            # Escaped "$$" or a stray "$" both render as a single "$"
+            parts.append('$')
+        last = match.end()
+    parts.append(prompt[last:].replace('{', '{{').replace('}', '}}'))
+    return ''.join(parts)
+
 
 class TemplateManager:
     """Manages prompt templates for video analysis."""
@@ -17,10 +83,17 @@ class TemplateManager:
         Initialize template manager.
         
         Args:
-            config: Application configuration dictionary
+            config: Application configuration dictionary. Treated as
+                immutable after init (model configs are cached from it).
         """
         self.config = config
         self.templates = {}
+        self._template_metadata: Dict[str, Dict[str, Any]] = {}
+        # 加载时的校验结果，按模板名存放，不写入模板字典本身
+        self._validation_errors: Dict[str, List[str]] = {}
+        # 模板名 -> (原始prompt, 转换后的格式串)；prompt 变化时自动重新转换
+        self._format_prompts: Dict[str, Tuple[str, str]] = {}
+        self._model_config_cache: Dict[str, Dict[str, Any]] = {}
         self._load_templates()
     
     def _load_templates(self) -> None:
@@ -29,33 +102,58 @@ class TemplateManager:
                                                              'src/gs_video_report/templates/prompts')
         
         # Convert relative path to absolute
-        if not Path(template_path).is_absolute():
-            template_path = Path(__file__).parent.parent.parent / template_path
-        else:
-            template_path = Path(template_path)
+        template_path = os.fspath(template_path)
+        if not os.path.isabs(template_path):
+            template_path = os.path.join(_MODULE_BASE, template_path)
         
-        if not template_path.exists():
+        if not os.path.isdir(template_path):
             raise FileNotFoundError(f"Template directory not found: {template_path}")
         
-        # Load all YAML files in templates directory
-        for template_file in template_path.glob("*.yaml"):
+        # Read all YAML files concurrently (I/O bound), then parse serially.
+        # Same selection as Path.glob("*.yaml") (dotfiles included); sorted so
+        # that duplicate template names resolve in a deterministic order.
+        with os.scandir(template_path) as entries:
+            template_files = sorted(
+                entry.path for entry in entries if entry.name.endswith('.yaml')
+            )
+        workers = max(1, min(_MAX_READ_WORKERS, len(template_files)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            contents = list(executor.map(_read_template_file, template_files))
+        
+        for template_file, raw in contents:
             try:
-                with open(template_file, 'r', encoding='utf-8') as f:
-                    template_data = yaml.safe_load(f)
+                if isinstance(raw, Exception):
+                    raise raw
+                template_data = yaml.load(raw, Loader=_YamlLoader)
                 
                 if template_data and 'templates' in template_data:
                     # File contains multiple templates
                     for name, template in template_data['templates'].items():
-                        template['name'] = name  # Ensure name is set
-                        self.templates[name] = template
+                        self._add_template(name, template)
                 elif template_data:
                     # File contains single template
-                    name = template_data.get('name', template_file.stem)
-                    template_data['name'] = name
-                    self.templates[name] = template_data
+                    name = template_data.get('name', os.path.splitext(os.path.basename(template_file))[0])
+                    self._add_template(name, template_data)
                     
             except Exception as e:
-                print(f"Warning: Failed to load template from {template_file}: {e}")
+                logger.warning("Failed to load template from %s: %s", template_file, e)
+    
+    def _add_template(self, name: str, template: Dict[str, Any]) -> None:
+        """Register a loaded template and cache its validation result."""
+        template['name'] = name  # Ensure name is set
+        self._validation_errors.pop(name, None)
+        errors = self._validation_errors[name] = self.validate_template(template)
+        if not errors:
+            self._format_prompts[name] = (template['prompt'], _to_format_string(template['prompt']))
+        else:
+            self._format_prompts.pop(name, None)
+        self.templates[name] = template
+        self._template_metadata[name] = {
+            'name': name,
+            'version': template.get('version', '1.0'),
+            'description': template.get('description', 'No description available'),
+            'parameters': template.get('parameters', [])
+        }
     
     def list_templates(self) -> List[Dict[str, Any]]:
         """
@@ -64,15 +162,7 @@ class TemplateManager:
         Returns:
             List of template metadata dictionaries
         """
-        return [
-            {
-                'name': template['name'],
-                'version': template.get('version', '1.0'),
-                'description': template.get('description', 'No description available'),
-                'parameters': template.get('parameters', [])
-            }
-            for template in self.templates.values()
-        ]
+        return [dict(metadata) for metadata in self._template_metadata.values()]
     
     def _get_api_model(self) -> str:
         """获取API模型配置"""
@@ -145,10 +235,14 @@ class TemplateManager:
         render_params = {**defaults, **kwargs}
         
         try:
-            # Use Python's string Template for safe parameter substitution
-            template_obj = Template(prompt_template)
-            rendered = template_obj.safe_substitute(**render_params)
-            return rendered
+            # Substitute via a pre-converted format string (see _to_format_string)
+            cached = self._format_prompts.get(template_name)
+            if cached is not None and cached[0] == prompt_template:
+                format_prompt = cached[1]
+            else:
+                format_prompt = _to_format_string(prompt_template)
+                self._format_prompts[template_name] = (prompt_template, format_prompt)
+            return format_prompt.format_map(_SafeDict(render_params))
         except Exception as e:
             raise ValueError(f"Failed to render template '{template_name}': {e}")
     
@@ -162,6 +256,10 @@ class TemplateManager:
         Returns:
             Model configuration dictionary
         """
+        cached = self._model_config_cache.get(template_name)
+        if cached is not None:
+            return dict(cached)
+        
         template = self.get_template(template_name)
         if not template:
             raise ValueError(f"Template '{template_name}' not found")
@@ -176,7 +274,9 @@ class TemplateManager:
             'model': self._get_api_model()
         }
         
-        return {**defaults, **model_config}
+        merged = {**defaults, **model_config}
+        self._model_config_cache[template_name] = merged
+        return dict(merged)
     
     def validate_template(self, template: Dict[str, Any]) -> List[str]:
         """
@@ -188,13 +288,18 @@ class TemplateManager:
         Returns:
             List of validation error messages (empty if valid)
         """
+        name = template.get('name')
+        if self.templates.get(name) is template and name in self._validation_errors:
+            return list(self._validation_errors[name])
+        
         errors = []
         
         # Check required fields
         if 'name' not in template:
             errors.append("Template missing 'name' field")
         
-        if 'prompt' not in template or not template['prompt'].strip():
+        prompt = template.get('prompt')
+        if not isinstance(prompt, str) or not prompt.strip():
             errors.append("Template missing 'prompt' content")
         
         # Check version format
@@ -0,0 +1,40 @@
+"""
+测试共用配置
+提供批量处理测试共用的配置模板（普通模块，测试文件直接运行时也可导入）
+"""
+
+import copy
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from gs_video_report.config import Config
+
+
+# 批量处理测试共用的配置模板，仅输出目录和API密钥不同（见 make_config）
+_CONFIG_TEMPLATE = {
+    'google_api': {
+        'api_key': 'test_api_key',
+        'model': 'gemini-2.5-flash',
+        'temperature': 0.7,
+        'max_tokens': 8192
+    },
+    'templates': {
+        'default_template': 'chinese_transcript',
+        'template_path': 'src/gs_video_report/templates/prompts'
+    },
+    'output': {
+        'default_path': None,
+        'file_naming': '{video_title}_{timestamp}',
+        'include_metadata': True
+    }
+}
+
+
+def make_config(output_path, api_key: str = 'test_api_key') -> Config:
+    """基于配置模板创建指定输出目录的测试配置"""
+    config_data = copy.deepcopy(_CONFIG_TEMPLATE)
+    config_data['google_api']['api_key'] = api_key
+    config_data['output']['default_path'] = str(output_path)
+    return Config(config_data)
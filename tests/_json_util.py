@@ -0,0 +1,57 @@
+"""
+测试报告JSON读写工具
+QA执行器和性能测试共用，orjson 为可选依赖（pip install orjson 或 poetry install -E fast）
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson  # 可选依赖：更快的JSON编解码
+except ImportError:
+    orjson = None
+
+
+def dump_json(data: Any, path: Union[str, Path],
+              default: Optional[Callable[[Any], Any]] = None) -> None:
+    """
+    写出JSON报告（UTF-8，2空格缩进，非ASCII字符原样输出），优先使用orjson
+
+    先写入同目录下的临时文件再原子替换，中断时不会留下半截报告。
+
+    Args:
+        data: 要序列化的数据
+        path: 报告文件路径
+        default: 无法直接序列化的对象的转换函数（如 dataclasses.asdict）
+    """
+    # 以常规权限创建临时文件，由内核按 umask 处理（不读写进程级的 umask，多线程调用安全）
+    tmp_path = os.path.join(os.path.dirname(os.path.abspath(path)),
+                            f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        if orjson is not None:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(data, default=default,
+                                     option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False, default=default)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_json(path: Union[str, Path]) -> Any:
+    """读取JSON报告，优先使用orjson"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -11,20 +11,44 @@ Comprehensive QA Test Suite for gs_videoReport v0.1.0
 - 用户体验测试
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import subprocess
-import json
 import time
-import hashlib
-import psutil
+import functools
+import re
 import threading
+import traceback
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from urllib.parse import urlparse, parse_qs
 import logging
-from typing import Dict, Any, List, Optional
+from typing import TYPE_CHECKING
 import yaml
+from typer.testing import CliRunner
+
+if TYPE_CHECKING:  # 只在注解中使用，运行时不需要
+    from typing import Dict, Any, List, Optional
+
+# 在进程内调用CLI，避免每次调用都启动新的解释器并重新导入整个应用
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from tests._json_util import dump_json, load_json
+try:
+    from src.gs_video_report.cli import app as cli_app
+except Exception:  # 导入失败时回退到子进程调用，由TC001_3报告问题
+    cli_app = None
+
+try:
+    cli_runner = CliRunner(mix_stderr=False)
+except TypeError:  # 新版click默认分离stderr
+    cli_runner = CliRunner()
+
+# CliRunner 会临时替换 sys.stdout/stderr，进程内调用必须串行
+_CLI_LOCK = threading.Lock()
 
 # 配置日志
 logging.basicConfig(
@@ -37,45 +61,98 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 按秒缓存的ISO时间戳 (秒, 格式化字符串)，单个元组整体替换以保证线程安全
+_ts_cache = (0, "")
+
+
+def _now_iso() -> str:
+    """返回当前时间的ISO字符串（秒级精度，同一秒内复用）"""
+    global _ts_cache
+    sec = int(time.time())
+    cached = _ts_cache
+    if cached[0] != sec:
+        cached = _ts_cache = (sec, datetime.fromtimestamp(sec).isoformat())
+    return cached[1]
+
+
+@dataclass(slots=True)
+class TestResult:
+    """单个测试用例的结果"""
+    __test__ = False  # 不是pytest测试类
+    
+    status: str
+    timestamp: str
+    details: str
+    performance: Dict[str, Any] = field(default_factory=dict)
+
+
 class PerformanceMonitor:
     """性能监控器"""
     
-    def __init__(self):
+    def __init__(self, interval: float = 1.0, pid: Optional[int] = None):
+        import psutil  # 仅性能测试需要，--report-only 等路径不导入
+        
         self.start_time = None
         self.end_time = None
         self.peak_memory = 0
         self.monitoring = False
-        self.memory_samples = []
+        self.interval = interval  # 采样间隔（秒）
+        self._stop_evt = threading.Event()
+        self._monitor_thread: Optional[threading.Thread] = None
+        # 仅保留运行统计量（总和/次数/峰值），内存占用不随监控时长增长
+        self.memory_sum = 0.0
+        self.memory_sample_count = 0
+        # 复用同一进程句柄，避免每次采样重新构造；pid 为空时监控当前进程
+        self._proc = psutil.Process(pid)
         
     def start_monitoring(self):
         """开始监控"""
         self.start_time = time.time()
         self.monitoring = True
-        self.memory_samples = []
+        self.peak_memory = 0
+        self.memory_sum = 0.0
+        self.memory_sample_count = 0
+        self._stop_evt.clear()
         
         # 启动内存监控线程
-        monitor_thread = threading.Thread(target=self._monitor_memory)
-        monitor_thread.daemon = True
-        monitor_thread.start()
+        self._monitor_thread = threading.Thread(target=self._monitor_memory)
+        self._monitor_thread.daemon = True
+        self._monitor_thread.start()
         
     def stop_monitoring(self):
         """停止监控"""
         self.end_time = time.time()
         self.monitoring = False
+        # 立即唤醒采样线程，并等待其写完最后一次采样
+        self._stop_evt.set()
+        if self._monitor_thread is not None:
+            self._monitor_thread.join(timeout=self.interval)
+            self._monitor_thread = None
+        # 结束时同步采样一次，保证至少有一个数据点
+        try:
+            self._sample()
+        except Exception:
+            pass
         return self.get_results()
         
+    def _sample(self):
+        """采集一次内存数据"""
+        with self._proc.oneshot():
+            memory_mb = self._proc.memory_info().rss / 1024 / 1024
+        self.memory_sum += memory_mb
+        self.memory_sample_count += 1
+        self.peak_memory = max(self.peak_memory, memory_mb)
+        
     def _monitor_memory(self):
         """监控内存使用"""
-        while self.monitoring:
+        while True:
             try:
-                process = psutil.Process()
-                memory_info = process.memory_info()
-                memory_mb = memory_info.rss / 1024 / 1024
-                self.memory_samples.append(memory_mb)
-                self.peak_memory = max(self.peak_memory, memory_mb)
-                time.sleep(1)  # 每秒采样一次
+                self._sample()
             except Exception:
                 break
+            # 按间隔采样；stop_monitoring() 会立即唤醒并结束循环
+            if self._stop_evt.wait(self.interval):
+                break
                 
     def get_results(self):
         """获取性能结果"""
@@ -83,28 +160,27 @@ class PerformanceMonitor:
         if self.start_time and self.end_time:
             duration = self.end_time - self.start_time
             
-        avg_memory = sum(self.memory_samples) / len(self.memory_samples) if self.memory_samples else 0
+        avg_memory = self.memory_sum / self.memory_sample_count if self.memory_sample_count else 0
         
         return {
             'duration_seconds': duration,
             'peak_memory_mb': self.peak_memory,
             'average_memory_mb': avg_memory,
-            'memory_samples_count': len(self.memory_samples)
+            'memory_samples_count': self.memory_sample_count
         }
 
 class ComprehensiveQATestSuite:
     """综合QA测试套件"""
     
+    # 输出扫描用的预编译正则，一次遍历匹配全部关键字
+    _HELP_RE = re.compile(r'Usage:|Options:|Arguments:')
+    _EXPECTED_TEMPLATES = ('comprehensive_lesson', 'summary_report', 'chinese_transcript')
+    _TPL_RE = re.compile('|'.join(map(re.escape, _EXPECTED_TEMPLATES)))
+    
     def __init__(self):
         self.test_results = {
             'start_time': datetime.now().isoformat(),
-            'environment': {
-                'python_version': sys.version,
-                'platform': os.name,
-                'working_directory': os.getcwd(),
-                'cpu_count': psutil.cpu_count(),
-                'total_memory_gb': psutil.virtual_memory().total / (1024**3)
-            },
+            # 'environment' 在生成报告时写入（见 environment 属性）
             'test_suites': {},
             'summary': {
                 'total_tests': 0,
@@ -136,7 +212,7 @@ class ComprehensiveQATestSuite:
             }
         }
         
-        # 创建测试目录
+        # 测试目录：套件通过 _test_dir() 取用时才创建
         self.test_dirs = {
             'output': Path('./test_output'),
             'performance': Path('./test_output/performance'),
@@ -145,45 +221,162 @@ class ComprehensiveQATestSuite:
             'configs': Path('./test_configs')
         }
         
-        for dir_path in self.test_dirs.values():
-            dir_path.mkdir(parents=True, exist_ok=True)
+        # 测试套件可并发执行，结果记录需加锁
+        self._results_lock = threading.Lock()
+        
+        # 测试配置文件的 mtime 快照（按目录 scandir 一次，首次使用时建立）
+        self._config_mtimes: Optional[Dict[str, float]] = None
+        
+        # CLI调用结果缓存: (参数, 配置文件mtime) -> CompletedProcess
+        self._cli_cache: Dict[tuple, subprocess.CompletedProcess] = {}
+        self._cli_cache_lock = threading.Lock()
+
+    @functools.cached_property
+    def environment(self) -> Dict[str, Any]:
+        """测试环境信息，首次写报告时才采集（--report-only 沿用已有结果，不会采集）"""
+        import psutil
+        
+        return {
+            'python_version': sys.version,
+            'platform': os.name,
+            'working_directory': os.getcwd(),
+            'cpu_count': psutil.cpu_count(),
+            'total_memory_gb': psutil.virtual_memory().total / (1024**3)
+        }
+
+    def _test_dir(self, name: str) -> Path:
+        """返回指定的测试目录，首次使用时创建"""
+        dir_path = self.test_dirs[name]
+        dir_path.mkdir(parents=True, exist_ok=True)
+        return dir_path
+
+    def _config_mtime(self, config_path: str) -> Optional[float]:
+        """
+        返回配置文件的修改时间，文件不存在时返回 None
+        
+        测试配置所在目录只扫描一次；不在快照中的路径回退到单次 stat。
+        """
+        if self._config_mtimes is None:
+            mtimes = {}
+            for directory in {os.path.dirname(path) or '.' for path in self.test_configs.values()}:
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if entry.is_file():
+                                mtimes[os.path.normpath(entry.path)] = entry.stat().st_mtime
+                except OSError:
+                    continue
+            self._config_mtimes = mtimes
+        
+        normalized = os.path.normpath(config_path)
+        if normalized in self._config_mtimes:
+            return self._config_mtimes[normalized]
+        try:
+            return os.path.getmtime(config_path)
+        except OSError:
+            return None
+
+    def _config_exists(self, config_path: str) -> bool:
+        """检查配置文件是否存在（复用 mtime 快照）"""
+        return self._config_mtime(config_path) is not None
+
+    def _run_cli(self, args: tuple, timeout: int = 30, use_cache: bool = True,
+                 isolated: bool = False) -> subprocess.CompletedProcess:
+        """
+        执行CLI命令并缓存结果
+        
+        同一命令在多个测试套件中重复调用（如 --help、list-templates），
+        每次都要付出解释器启动和模块导入的开销。缓存键包含 --config
+        指向文件的修改时间，配置被编辑后自动失效。性能测试需要真实执行，
+        应传入 use_cache=False；需要进程隔离的用例传入 isolated=True。
+        """
+        if not use_cache:
+            return self._execute_cli(args, timeout, isolated)
+        
+        config_mtime = None
+        if '--config' in args:
+            config_index = args.index('--config') + 1
+            if config_index < len(args):
+                config_mtime = self._config_mtime(args[config_index])
+        
+        cache_key = (args, config_mtime, isolated)
+        with self._cli_cache_lock:
+            cached = self._cli_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = self._execute_cli(args, timeout, isolated)
+        with self._cli_cache_lock:
+            self._cli_cache[cache_key] = result
+        return result
+
+    def _execute_cli(self, args: tuple, timeout: int,
+                     isolated: bool) -> subprocess.CompletedProcess:
+        """
+        执行CLI命令
+        
+        默认通过 CliRunner 在进程内调用（timeout 不生效）；isolated=True
+        或CLI无法导入时使用子进程。进程内调用由 _CLI_LOCK 串行化，
+        CLI抛出的未处理异常（SystemExit 除外）以 traceback 形式写入 stderr，
+        与子进程调用时的输出一致。
+        """
+        if isolated or cli_app is None:
+            # 以字节捕获输出并一次性按UTF-8解码，避免文本模式的逐块解码和区域设置差异
+            result = subprocess.run([sys.executable, '-m', 'src.gs_video_report.cli', *args],
+                                    capture_output=True, timeout=timeout)
+            return subprocess.CompletedProcess(result.args, result.returncode,
+                                               result.stdout.decode('utf-8', 'replace'),
+                                               result.stderr.decode('utf-8', 'replace'))
+        
+        with _CLI_LOCK:
+            result = cli_runner.invoke(cli_app, list(args))
+        try:
+            stderr = result.stderr
+        except ValueError:  # stderr 未单独捕获
+            stderr = ''
+        if result.exception is not None and not isinstance(result.exception, SystemExit):
+            stderr += ''.join(traceback.format_exception(*result.exc_info))
+        return subprocess.CompletedProcess(list(args), result.exit_code, result.stdout, stderr)
 
     def log_test_result(self, suite_name: str, test_name: str, status: str, 
                        details: str, performance: Optional[Dict] = None):
-        """记录测试结果"""
-        if suite_name not in self.test_results['test_suites']:
-            self.test_results['test_suites'][suite_name] = {
+        """记录测试结果（统计数在生成报告时汇总）"""
+        with self._results_lock:
+            suite = self.test_results['test_suites'].setdefault(suite_name, {
                 'tests': {},
                 'summary': {'total': 0, 'passed': 0, 'failed': 0, 'skipped': 0}
-            }
-            self.test_results['summary']['total_suites'] += 1
-            
-        suite = self.test_results['test_suites'][suite_name]
-        
-        suite['tests'][test_name] = {
-            'status': status,
-            'timestamp': datetime.now().isoformat(),
-            'details': details,
-            'performance': performance or {}
-        }
-        
-        # 更新统计
-        suite['summary']['total'] += 1
-        self.test_results['summary']['total_tests'] += 1
+            })
+            suite['tests'][test_name] = TestResult(status, _now_iso(), details, performance or {})
         
         if status == 'PASSED':
-            suite['summary']['passed'] += 1
-            self.test_results['summary']['passed_tests'] += 1
             logger.info(f"✅ {suite_name}.{test_name}: PASSED")
         elif status == 'FAILED':
-            suite['summary']['failed'] += 1
-            self.test_results['summary']['failed_tests'] += 1
             logger.error(f"❌ {suite_name}.{test_name}: FAILED - {details}")
         else:
-            suite['summary']['skipped'] += 1
-            self.test_results['summary']['skipped_tests'] += 1
             logger.warning(f"⏭️  {suite_name}.{test_name}: SKIPPED - {details}")
 
+    def _update_summary(self):
+        """根据已记录的测试结果汇总各套件及整体统计"""
+        totals = Counter()
+        suites = self.test_results['test_suites']
+        for suite in suites.values():
+            counts = Counter(result.status for result in suite['tests'].values())
+            suite['summary'] = {
+                'total': len(suite['tests']),
+                'passed': counts['PASSED'],
+                'failed': counts['FAILED'],
+                'skipped': len(suite['tests']) - counts['PASSED'] - counts['FAILED']
+            }
+            totals.update(suite['summary'])
+        
+        self.test_results['summary'] = {
+            'total_tests': totals['total'],
+            'passed_tests': totals['passed'],
+            'failed_tests': totals['failed'],
+            'skipped_tests': totals['skipped'],
+            'total_suites': len(suites)
+        }
+
     def test_environment_setup(self):
         """TS001: 环境设置测试套件"""
         suite_name = "TS001_Environment"
@@ -217,8 +410,7 @@ class ComprehensiveQATestSuite:
         
         # TC001.3: CLI模块导入
         try:
-            result = subprocess.run([sys.executable, '-m', 'src.gs_video_report.cli', '--help'], 
-                                  capture_output=True, text=True, timeout=30)
+            result = self._run_cli(('--help',))
             if result.returncode == 0:
                 self.log_test_result(suite_name, "TC001_3_CLI_Import", "PASSED", 
                                    "CLI模块成功导入")
@@ -236,8 +428,7 @@ class ComprehensiveQATestSuite:
         
         # TC002.1: 版本信息
         try:
-            result = subprocess.run([sys.executable, '-m', 'src.gs_video_report.cli', 'version'], 
-                                  capture_output=True, text=True, timeout=30)
+            result = self._run_cli(('version',))
             if result.returncode == 0 and "0.1.0" in result.stdout:
                 self.log_test_result(suite_name, "TC002_1_Version", "PASSED", 
                                    f"版本信息正确: {result.stdout.strip()}")
@@ -250,11 +441,8 @@ class ComprehensiveQATestSuite:
         
         # TC002.2: 模板列表
         try:
-            result = subprocess.run([sys.executable, '-m', 'src.gs_video_report.cli', 
-                                   'list-templates', '--config', self.test_configs['valid']], 
-                                  capture_output=True, text=True, timeout=30)
+            result = self._run_cli(('list-templates', '--config', self.test_configs['valid']))
             if result.returncode == 0 and "chinese_transcript" in result.stdout:
-                template_count = result.stdout.count('│')  # 粗略计算模板数量
                 self.log_test_result(suite_name, "TC002_2_Templates", "PASSED", 
                                    f"模板列表正常，包含中文转录模板")
             else:
@@ -266,8 +454,7 @@ class ComprehensiveQATestSuite:
         
         # TC002.3: 帮助信息
         try:
-            result = subprocess.run([sys.executable, '-m', 'src.gs_video_report.cli', '--help'], 
-                                  capture_output=True, text=True, timeout=30)
+            result = self._run_cli(('--help',))
             if result.returncode == 0 and "Commands" in result.stdout:
                 self.log_test_result(suite_name, "TC002_3_Help", "PASSED", 
                                    "帮助信息完整")
@@ -284,12 +471,11 @@ class ComprehensiveQATestSuite:
         logger.info(f"=== {suite_name}: 错误场景测试 ===")
         
         # TC003.1: 无效API密钥
-        if Path(self.test_configs['invalid_api']).exists():
+        if self._config_exists(self.test_configs['invalid_api']):
             try:
-                result = subprocess.run([
-                    sys.executable, '-m', 'src.gs_video_report.cli', 'list-templates',
-                    '--config', self.test_configs['invalid_api']
-                ], capture_output=True, text=True, timeout=30)
+                # 需要真实的进程隔离，保留子进程调用
+                result = self._run_cli(('list-templates', '--config', self.test_configs['invalid_api']),
+                                       isolated=True)
                 
                 # 应该显示警告但不应该崩溃
                 if "Warning" in result.stdout or result.returncode == 0:
@@ -308,10 +494,7 @@ class ComprehensiveQATestSuite:
         # TC003.2: 无效视频文件
         try:
             fake_video_path = "nonexistent_video.mp4"
-            result = subprocess.run([
-                sys.executable, '-m', 'src.gs_video_report.cli', 'main',
-                fake_video_path, '--config', self.test_configs['valid']
-            ], capture_output=True, text=True, timeout=30)
+            result = self._run_cli(('main', fake_video_path, '--config', self.test_configs['valid']))
             
             if result.returncode != 0 and ("not found" in result.stderr.lower() or 
                                          "error" in result.stderr.lower()):
@@ -329,26 +512,25 @@ class ComprehensiveQATestSuite:
         suite_name = "TS004_Template_System"
         logger.info(f"=== {suite_name}: 模板系统测试 ===")
         
-        templates_to_test = ['comprehensive_lesson', 'summary_report', 'chinese_transcript']
+        templates_to_test = self._EXPECTED_TEMPLATES
         
-        for template in templates_to_test:
-            try:
-                # 测试模板在列表中是否存在
-                result = subprocess.run([
-                    sys.executable, '-m', 'src.gs_video_report.cli', 'list-templates',
-                    '--config', self.test_configs['valid']
-                ], capture_output=True, text=True, timeout=30)
-                
-                if result.returncode == 0 and template in result.stdout:
-                    self.log_test_result(suite_name, f"TC004_{template}_exists", "PASSED", 
-                                       f"模板{template}存在于系统中")
-                else:
-                    self.log_test_result(suite_name, f"TC004_{template}_exists", "FAILED", 
-                                       f"模板{template}不存在")
-                    
-            except Exception as e:
+        try:
+            # 所有模板共用一次 list-templates 调用（与TC002_2共享缓存），一次扫描找出所有模板名
+            result = self._run_cli(('list-templates', '--config', self.test_configs['valid']))
+            found_templates = set(self._TPL_RE.findall(result.stdout)) if result.returncode == 0 else set()
+        except Exception as e:
+            for template in templates_to_test:
                 self.log_test_result(suite_name, f"TC004_{template}_exists", "FAILED", 
                                    f"模板{template}测试异常: {str(e)}")
+            return
+        
+        for template in templates_to_test:
+            if template in found_templates:
+                self.log_test_result(suite_name, f"TC004_{template}_exists", "PASSED", 
+                                   f"模板{template}存在于系统中")
+            else:
+                self.log_test_result(suite_name, f"TC004_{template}_exists", "FAILED", 
+                                   f"模板{template}不存在")
 
     def test_performance_scenarios(self):
         """TS005: 性能测试套件"""
@@ -356,17 +538,21 @@ class ComprehensiveQATestSuite:
         logger.info(f"=== {suite_name}: 性能测试 ===")
         
         # TC005.1: 内存使用监控
-        monitor = PerformanceMonitor()
-        monitor.start_monitoring()
-        
+        # 在独立子进程中执行一个轻量级操作并监控该子进程：执行器进程已导入CLI、
+        # 且与其他套件并发运行，其内存不能代表CLI本身的内存占用
+        monitor = None
         try:
-            # 执行一个轻量级操作
-            result = subprocess.run([
-                sys.executable, '-m', 'src.gs_video_report.cli', 'list-templates',
-                '--config', self.test_configs['valid']
-            ], capture_output=True, text=True, timeout=30)
-            
-            time.sleep(2)  # 等待监控数据
+            proc = subprocess.Popen([sys.executable, '-m', 'src.gs_video_report.cli', 'list-templates',
+                                     '--config', self.test_configs['valid']],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            monitor = PerformanceMonitor(interval=0.1, pid=proc.pid)
+            monitor.start_monitoring()
+            try:
+                proc.wait(timeout=30)
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
             perf_results = monitor.stop_monitoring()
             
             if perf_results['peak_memory_mb'] < 200:  # 200MB以下认为正常
@@ -377,7 +563,8 @@ class ComprehensiveQATestSuite:
                                    f"内存使用过高", perf_results)
                 
         except Exception as e:
-            monitor.stop_monitoring()
+            if monitor is not None:
+                monitor.stop_monitoring()
             self.log_test_result(suite_name, "TC005_1_Memory_Usage", "FAILED", 
                                f"性能测试异常: {str(e)}")
 
@@ -388,9 +575,7 @@ class ComprehensiveQATestSuite:
         
         # TC006.1: 错误信息友好性
         try:
-            result = subprocess.run([
-                sys.executable, '-m', 'src.gs_video_report.cli', 'main'
-            ], capture_output=True, text=True, timeout=30)
+            result = self._run_cli(('main',))
             
             if result.returncode != 0 and ("Usage:" in result.stderr or "error" in result.stderr.lower()):
                 self.log_test_result(suite_name, "TC006_1_Error_Messages", "PASSED", 
@@ -404,12 +589,9 @@ class ComprehensiveQATestSuite:
         
         # TC006.2: 帮助信息清晰度
         try:
-            result = subprocess.run([
-                sys.executable, '-m', 'src.gs_video_report.cli', 'main', '--help'
-            ], capture_output=True, text=True, timeout=30)
+            result = self._run_cli(('main', '--help'))
             
-            help_keywords = ['Usage:', 'Options:', 'Arguments:']
-            keywords_found = sum(1 for keyword in help_keywords if keyword in result.stdout)
+            keywords_found = len(set(self._HELP_RE.findall(result.stdout)))
             
             if keywords_found >= 2:
                 self.log_test_result(suite_name, "TC006_2_Help_Clarity", "PASSED", 
@@ -431,58 +613,77 @@ class ComprehensiveQATestSuite:
         duration = (end - start).total_seconds()
         
         self.test_results['execution_time'] = f"{duration:.2f} seconds"
+        if 'environment' not in self.test_results:
+            self.test_results['environment'] = self.environment
+        self._update_summary()
         
         # 保存详细结果
         report_file = Path('tests/comprehensive_qa_results.json')
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(self.test_results, f, indent=2, ensure_ascii=False)
-        
-        # 生成简要报告
-        logger.info("=" * 80)
-        logger.info("GS_VIDEOREPORT V0.1.0 - 综合QA测试报告")
-        logger.info("=" * 80)
-        logger.info(f"测试执行时间: {self.test_results['execution_time']}")
-        logger.info(f"测试套件数: {self.test_results['summary']['total_suites']}")
-        logger.info(f"测试用例总数: {self.test_results['summary']['total_tests']}")
-        logger.info(f"通过: {self.test_results['summary']['passed_tests']} ✅")
-        logger.info(f"失败: {self.test_results['summary']['failed_tests']} ❌")
-        logger.info(f"跳过: {self.test_results['summary']['skipped_tests']} ⏭️")
-        
-        success_rate = (self.test_results['summary']['passed_tests'] / 
-                       max(self.test_results['summary']['total_tests'], 1)) * 100
-        logger.info(f"成功率: {success_rate:.1f}%")
-        
-        # 详细套件结果
-        logger.info("\n" + "="*60)
-        logger.info("测试套件详细结果:")
-        logger.info("="*60)
+        dump_json(self.test_results, report_file, default=asdict)
+        
+        # 生成简要报告（汇总为一条日志输出，避免逐行加锁写入各handler）
+        summary = self.test_results['summary']
+        success_rate = (summary['passed_tests'] / max(summary['total_tests'], 1)) * 100
+        lines = [
+            "=" * 80,
+            "GS_VIDEOREPORT V0.1.0 - 综合QA测试报告",
+            "=" * 80,
+            f"测试执行时间: {self.test_results['execution_time']}",
+            f"测试套件数: {summary['total_suites']}",
+            f"测试用例总数: {summary['total_tests']}",
+            f"通过: {summary['passed_tests']} ✅",
+            f"失败: {summary['failed_tests']} ❌",
+            f"跳过: {summary['skipped_tests']} ⏭️",
+            f"成功率: {success_rate:.1f}%",
+            # 详细套件结果
+            "\n" + "=" * 60,
+            "测试套件详细结果:",
+            "=" * 60
+        ]
         
         for suite_name, suite_data in self.test_results['test_suites'].items():
             suite_summary = suite_data['summary']
             suite_success_rate = (suite_summary['passed'] / max(suite_summary['total'], 1)) * 100
-            logger.info(f"{suite_name}: {suite_success_rate:.1f}% "
-                       f"({suite_summary['passed']}/{suite_summary['total']})")
+            lines.append(f"{suite_name}: {suite_success_rate:.1f}% "
+                         f"({suite_summary['passed']}/{suite_summary['total']})")
             
             # 显示失败的测试
             for test_name, test_data in suite_data['tests'].items():
-                if test_data['status'] == 'FAILED':
-                    logger.info(f"  ❌ {test_name}: {test_data['details']}")
+                if test_data.status == 'FAILED':
+                    lines.append(f"  ❌ {test_name}: {test_data.details}")
         
-        logger.info(f"\n详细结果保存至: {report_file}")
+        lines.append(f"\n详细结果保存至: {report_file}")
+        logger.info("\n".join(lines))
         
         return self.test_results
 
-    def run_all_tests(self):
-        """执行所有测试套件"""
+    def run_all_tests(self, max_workers: int = 6):
+        """
+        执行所有测试套件
+        
+        各套件相互独立，用线程池并发执行；max_workers=1 时退化为串行执行。
+        注意进程内的CLI调用由 _CLI_LOCK 串行化，并发只对子进程调用（isolated=True、
+        TS005）和非CLI的检查生效，CLI调用较多时整体接近串行。
+        """
         logger.info("开始执行GS_VIDEOREPORT V0.1.0综合QA测试")
         
+        suites = [
+            self.test_environment_setup,
+            self.test_cli_basic_functionality,
+            self.test_template_system,
+            self.test_error_scenarios,
+            self.test_performance_scenarios,
+            self.test_user_experience
+        ]
+        
         try:
-            self.test_environment_setup()
-            self.test_cli_basic_functionality()
-            self.test_template_system()
-            self.test_error_scenarios()
-            self.test_performance_scenarios()
-            self.test_user_experience()
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                futures = {executor.submit(suite): suite.__name__ for suite in suites}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"测试套件 {futures[future]} 执行出现意外错误: {e}")
             
         except KeyboardInterrupt:
             logger.warning("测试被用户中断")
@@ -499,6 +700,7 @@ def main():
     parser.add_argument('--suite', help='执行特定测试套件 (如: TS001)')
     parser.add_argument('--test', help='执行特定测试用例 (如: TC001_1)')
     parser.add_argument('--report-only', action='store_true', help='仅生成报告')
+    parser.add_argument('--workers', type=int, default=6, help='并发执行的测试套件数 (1为串行)')
     
     args = parser.parse_args()
     
@@ -507,8 +709,10 @@ def main():
     if args.report_only:
         # 读取现有结果并生成报告
         try:
-            with open('tests/comprehensive_qa_results.json', 'r', encoding='utf-8') as f:
-                suite.test_results = json.load(f)
+            suite.test_results = load_json(Path('tests/comprehensive_qa_results.json'))
+            for suite_data in suite.test_results['test_suites'].values():
+                suite_data['tests'] = {name: TestResult(**data)
+                                       for name, data in suite_data['tests'].items()}
             suite.generate_comprehensive_report()
         except FileNotFoundError:
             logger.error("没有找到测试结果文件，请先运行测试")
@@ -532,7 +736,7 @@ def main():
             sys.exit(1)
     else:
         # 执行所有测试
-        results = suite.run_all_tests()
+        results = suite.run_all_tests(max_workers=args.workers)
         
         # 根据测试结果设置退出代码
         if results['summary']['failed_tests'] > 0:
@@ -8,30 +8,142 @@ import os
 import sys
 import subprocess
 import json
+import re
 import time
 import hashlib
+import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from pathlib import Path
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs
+import atexit
+import queue
 import logging
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 
-# 配置日志
+try:
+    import requests
+except ImportError:  # 由TC000依赖检查报告
+    requests = None
+
+# 共用的报告读写工具位于 tests 包内，作为脚本运行时需把项目根目录加入 sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from tests._json_util import dump_json
+
+# 配置日志：记录先进入队列，由单独的监听线程写入文件和终端，
+# 避免测试计时区间内的同步写操作
+_log_queue = queue.Queue(-1)
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_file_handler = logging.FileHandler('tests/qa_test_results.log')
+_log_stream_handler = logging.StreamHandler()
+for _handler in (_log_file_handler, _log_stream_handler):
+    _handler.setFormatter(_log_formatter)
+# 文件日志先缓存在内存中，满512条或出现ERROR时再批量写入
+_log_memory_handler = MemoryHandler(512, flushLevel=logging.ERROR, target=_log_file_handler)
+
+# 队列端只保留原始消息，时间戳和级别由监听端的格式化器添加
+_log_queue_handler = QueueHandler(_log_queue)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('tests/qa_test_results.log'),
-        logging.StreamHandler()
-    ]
+    format='%(message)s',
+    handlers=[_log_queue_handler]
 )
+_log_listener = QueueListener(_log_queue, _log_memory_handler, _log_stream_handler)
+_log_listener.start()
 logger = logging.getLogger(__name__)
 
+
+@atexit.register
+def _stop_log_listener():
+    """退出时停止监听线程，并摘除队列处理器，避免解释器关闭阶段的日志记录报错"""
+    logging.getLogger().removeHandler(_log_queue_handler)
+    _log_listener.stop()
+
+
+def _flush_log_queue():
+    """写出队列中所有待处理的日志记录（停止监听线程后重新启动）"""
+    _log_listener.stop()
+    _log_memory_handler.flush()
+    _log_listener.start()
+
+# 依赖检查结果缓存（跨运行复用），条目超过TTL或相关文件变化后失效
+DEP_CACHE_FILE = Path('tests/.dep_cache.json')
+DEP_CACHE_TTL_SECONDS = 3600
+TEMPLATE_DIR = Path('src/gs_video_report/templates/prompts')
+
+# 测试视频目录中记录已下载视频SHA-256的文件，校验通过时跳过重新下载
+VIDEO_DIGEST_FILE = '.sha256'
+
+# 单次子进程探测：Python版本、requests版本
+PYTHON_PROBE = """
+import json, platform
+out = {'python': 'Python ' + platform.python_version()}
+try:
+    import requests
+    out['requests'] = requests.__version__
+except Exception as e:
+    out['requests_error'] = str(e)
+print(json.dumps(out))
+"""
+
+# 中文转录格式检查所需的标记，合并为一个正则一次扫描完成。
+# 较长的标记放在前面；包含 "# " 的标题标记命中时也视为找到了 "# "
+FORMAT_MARKERS = {
+    'basic_info': '## 基本信息',
+    'transcript_content': '## 逐字稿内容',
+    'title_text': '中文逐字稿分析',
+    'key_terms': '关键术语',
+    'first_person': '第一人称',
+    'terms': '术语',
+    'title_marker': '# ',
+    'open_bracket': '[',
+    'close_bracket': ']'
+}
+FORMAT_MARKER_RE = re.compile('|'.join(
+    f'(?P<{name}>{re.escape(marker)})' for name, marker in FORMAT_MARKERS.items()
+))
+
+def _probe(cmd, timeout=10):
+    """
+    运行依赖探测命令，只捕获stdout
+    
+    成功时stderr直接丢弃；返回码非零时带stderr捕获重新执行一次，用于错误信息。
+    """
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            text=True, timeout=timeout)
+    if result.returncode != 0:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    return result
+
+
+_ts_cache = (0.0, "")
+
+
+def _now_iso():
+    """返回当前时间的ISO字符串（毫秒精度，5毫秒内复用上次结果）"""
+    global _ts_cache
+    now = time.time()
+    cached = _ts_cache
+    if now - cached[0] > 0.005:
+        cached = _ts_cache = (now, datetime.fromtimestamp(now).isoformat(timespec='milliseconds'))
+    return cached[1]
+
+
 class QATestExecutor:
     """QA测试执行器"""
     
-    def __init__(self):
+    def __init__(self, use_dep_cache=True):
+        self.use_dep_cache = use_dep_cache
+        self._t0 = time.monotonic()
+        self._probe_pool = None
+        # 复用同一会话，访问同一主机的多次探测可以复用连接（keep-alive）
+        self._session = None
+        if requests is not None:
+            self._session = requests.Session()
+            self._session.headers.update({'User-Agent': 'Mozilla/5.0 (compatible; gs_videoReport/1.0)'})
         self.test_results = {
-            'start_time': datetime.now().isoformat(),
+            'start_time': _now_iso(),
             'environment': {
                 'python_version': sys.version,
                 'platform': os.name,
@@ -75,70 +187,184 @@ class QATestExecutor:
 
     def log_test_result(self, test_id, status, details, performance=None):
         """记录测试结果"""
+        # 每个用例只写入一次（单次字典赋值），汇总统计在生成报告时统一计算
         self.test_results['test_cases'][test_id] = {
             'status': status,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'details': details,
             'performance': performance or {}
         }
         
-        self.test_results['summary']['total'] += 1
         if status == 'PASSED':
-            self.test_results['summary']['passed'] += 1
             logger.info(f"✅ {test_id}: PASSED")
         elif status == 'FAILED':
-            self.test_results['summary']['failed'] += 1
             logger.error(f"❌ {test_id}: FAILED - {details}")
         else:
-            self.test_results['summary']['skipped'] += 1
             logger.warning(f"⏭️  {test_id}: SKIPPED - {details}")
 
+    def _load_dep_cache(self):
+        """读取依赖检查缓存"""
+        if not self.use_dep_cache:
+            return {}
+        try:
+            with open(DEP_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_dep_cache(self, cache):
+        """保存依赖检查缓存"""
+        if not self.use_dep_cache:
+            return
+        try:
+            with open(DEP_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"无法写入依赖缓存: {e}")
+
+    @staticmethod
+    def _dep_cache_key(dep_name, *paths):
+        """依赖缓存键：解释器 + 依赖名 + 相关文件的修改时间"""
+        stamps = []
+        for path in paths:
+            try:
+                stamps.append(os.path.getmtime(path))
+            except (OSError, TypeError):
+                stamps.append(None)
+        raw = repr((sys.executable, dep_name, tuple(map(str, paths)), tuple(stamps)))
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    @staticmethod
+    def _cached_result(cache, key):
+        """返回未过期的缓存结果，否则返回 None"""
+        entry = cache.get(key)
+        if entry and time.time() - entry.get('ts', 0) < DEP_CACHE_TTL_SECONDS:
+            return entry['result']
+        return None
+
+    def _get_probe_pool(self):
+        """获取探测子进程使用的线程池（按需创建，生成报告时关闭）"""
+        if self._probe_pool is None:
+            self._probe_pool = ThreadPoolExecutor(max_workers=2)
+        return self._probe_pool
+
+    def _run_python_probe(self):
+        """
+        在一个子进程中完成所有需要Python解释器的检查
+        
+        Python版本和requests版本原本需要两次解释器启动，
+        合并为一次 `python -c` 调用并以JSON返回。
+        """
+        try:
+            result = _probe([sys.executable, '-c', PYTHON_PROBE], timeout=30)
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip() or f"exit code {result.returncode}")
+            probe = json.loads(result.stdout)
+        except Exception as e:
+            error = {'status': 'ERROR', 'error': str(e)}
+            return {name: dict(error) for name in ('python', 'requests')}
+        
+        results = {'python': {'status': 'OK', 'version': probe['python']}}
+        if 'requests' in probe:
+            results['requests'] = {'status': 'OK', 'version': probe['requests']}
+        else:
+            results['requests'] = {'status': 'NOT_FOUND', 'error': probe.get('requests_error', '')}
+        return results
+
+    @staticmethod
+    def _check_template_files():
+        """直接读取模板YAML文件确认 chinese_transcript 模板存在，无需加载整个CLI"""
+        try:
+            import yaml
+            loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+            for template_file in sorted(TEMPLATE_DIR.glob('*.yaml')):
+                data = yaml.load(template_file.read_bytes(), Loader=loader) or {}
+                if 'chinese_transcript' in (data.get('templates') or {}) or \
+                        data.get('name') == 'chinese_transcript':
+                    return {'status': 'OK'}
+            return {'status': 'ERROR', 'details': f'{TEMPLATE_DIR} 中缺少 chinese_transcript 模板'}
+        except Exception as e:
+            return {'status': 'ERROR', 'error': str(e)}
+
     def check_dependencies(self):
         """TC000: 检查系统依赖"""
         logger.info("=== TC000: 系统依赖检查 ===")
         
-        dependencies = {
-            'python': {'cmd': [sys.executable, '--version'], 'required': True},
-            'yt-dlp': {'cmd': ['yt-dlp', '--version'], 'required': False},
-            'requests': {'cmd': [sys.executable, '-c', 'import requests; print(requests.__version__)'], 'required': True}
+        dep_cache = self._load_dep_cache()
+        results = {}
+        
+        # Python相关检查：缓存键包含解释器；模板检查在模板文件变化后失效
+        cache_keys = {
+            'python': self._dep_cache_key('python', sys.executable),
+            'requests': self._dep_cache_key('requests', sys.executable),
+            'chinese_transcript_template': self._dep_cache_key(
+                'chinese_transcript_template', TEMPLATE_DIR, *sorted(TEMPLATE_DIR.glob('*.yaml')))
+        }
+        labels = {
+            'python': 'python',
+            'requests': 'requests',
+            'chinese_transcript_template': '中文转录模板'
         }
         
-        results = {}
-        for dep_name, dep_info in dependencies.items():
+        for dep_name, cache_key in cache_keys.items():
+            cached = self._cached_result(dep_cache, cache_key)
+            if cached is not None:
+                results[dep_name] = cached
+                logger.info(f"  ✅ {labels[dep_name]}: {cached.get('version', 'OK')} (缓存)")
+        
+        # yt-dlp 不是Python包，单独检查；两个探测子进程在线程池中并发启动
+        ytdlp_path = shutil.which('yt-dlp')
+        ytdlp_key = self._dep_cache_key('yt-dlp', ytdlp_path or 'yt-dlp')
+        ytdlp_cached = self._cached_result(dep_cache, ytdlp_key)
+        ytdlp_future = None
+        if ytdlp_cached is None and ytdlp_path is not None:
+            ytdlp_future = self._get_probe_pool().submit(_probe, ['yt-dlp', '--version'])
+        
+        if any(dep_name not in results for dep_name in cache_keys):
+            probe_future = None
+            if 'python' not in results or 'requests' not in results:
+                probe_future = self._get_probe_pool().submit(self._run_python_probe)
+            fresh_results = {}
+            if 'chinese_transcript_template' not in results:
+                fresh_results['chinese_transcript_template'] = self._check_template_files()
+            if probe_future is not None:
+                fresh_results.update(probe_future.result())
+            for dep_name, cache_key in cache_keys.items():
+                if dep_name in results:
+                    continue
+                dep_result = fresh_results[dep_name]
+                results[dep_name] = dep_result
+                if dep_result['status'] == 'OK':
+                    dep_cache[cache_key] = {'ts': time.time(), 'result': dep_result}
+                    logger.info(f"  ✅ {labels[dep_name]}: {dep_result.get('version', 'OK')}")
+                else:
+                    detail = dep_result.get('error') or dep_result.get('details')
+                    logger.error(f"  ❌ {labels[dep_name]}: {detail}")
+        
+        if ytdlp_cached is not None:
+            results['yt-dlp'] = ytdlp_cached
+            logger.info(f"  ✅ yt-dlp: {ytdlp_cached.get('version', '')} (缓存)")
+        elif ytdlp_future is None:
+            # 不在PATH中时无需启动子进程
+            results['yt-dlp'] = {'status': 'NOT_FOUND', 'error': 'yt-dlp 不在 PATH 中'}
+            logger.warning("  ⚠️  yt-dlp: 可选依赖未找到 - 不在 PATH 中")
+        else:
             try:
-                result = subprocess.run(
-                    dep_info['cmd'], 
-                    capture_output=True, 
-                    text=True, 
-                    timeout=10
-                )
+                result = ytdlp_future.result()
                 if result.returncode == 0:
                     version = result.stdout.strip()
-                    results[dep_name] = {'status': 'OK', 'version': version}
-                    logger.info(f"  ✅ {dep_name}: {version}")
+                    results['yt-dlp'] = {'status': 'OK', 'version': version}
+                    dep_cache[ytdlp_key] = {'ts': time.time(), 'result': results['yt-dlp']}
+                    logger.info(f"  ✅ yt-dlp: {version}")
                 else:
-                    results[dep_name] = {'status': 'ERROR', 'error': result.stderr}
-                    logger.error(f"  ❌ {dep_name}: {result.stderr}")
+                    results['yt-dlp'] = {'status': 'ERROR', 'error': result.stderr}
+                    logger.error(f"  ❌ yt-dlp: {result.stderr}")
             except (FileNotFoundError, subprocess.TimeoutExpired) as e:
-                results[dep_name] = {'status': 'NOT_FOUND', 'error': str(e)}
-                if dep_info['required']:
-                    logger.error(f"  ❌ {dep_name}: 必需依赖未找到 - {e}")
-                else:
-                    logger.warning(f"  ⚠️  {dep_name}: 可选依赖未找到 - {e}")
+                results['yt-dlp'] = {'status': 'NOT_FOUND', 'error': str(e)}
+                logger.warning(f"  ⚠️  yt-dlp: 可选依赖未找到 - {e}")
         
-        # 检查模板配置
-        try:
-            cmd = [sys.executable, '-m', 'src.gs_video_report.cli', 'list-templates']
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0 and 'chinese_transcript' in result.stdout:
-                results['chinese_transcript_template'] = {'status': 'OK'}
-                logger.info("  ✅ 中文转录模板配置正确")
-            else:
-                results['chinese_transcript_template'] = {'status': 'ERROR', 'details': result.stderr}
-                logger.error("  ❌ 中文转录模板配置错误")
-        except Exception as e:
-            results['chinese_transcript_template'] = {'status': 'ERROR', 'error': str(e)}
-            logger.error(f"  ❌ 模板检查失败: {e}")
+        # 只缓存成功的检查结果，失败项下次重新检查
+        self._save_dep_cache(dep_cache)
         
         # 判断整体依赖检查结果
         critical_deps = ['python', 'requests', 'chinese_transcript_template']
@@ -158,21 +384,19 @@ class QATestExecutor:
         
         logger.info(f"=== {test_id}: {video_info['description']}访问测试 ===")
         
-        start_time = time.time()
+        start_time = time.monotonic()
+        
+        if self._session is None:
+            self.log_test_result(test_id, 'FAILED', 'requests未安装，无法测试视频访问')
+            return False
         
         try:
-            import requests
-            
             # 测试视频URL可访问性
             logger.info(f"测试URL: {video_info['url']}")
             
-            response = requests.head(
-                video_info['url'],
-                timeout=10,
-                headers={'User-Agent': 'Mozilla/5.0 (compatible; gs_videoReport/1.0)'}
-            )
+            response = self._session.head(video_info['url'], timeout=10)
             
-            access_time = time.time() - start_time
+            access_time = time.monotonic() - start_time
             
             logger.info(f"HTTP状态码: {response.status_code}")
             logger.info(f"响应时间: {access_time:.2f}秒")
@@ -196,7 +420,7 @@ class QATestExecutor:
                 return False
                 
         except requests.RequestException as e:
-            access_time = time.time() - start_time
+            access_time = time.monotonic() - start_time
             if video_type == 'private':
                 # 私有视频网络错误是预期的
                 details = f"私有视频按预期无法访问: {str(e)}"
@@ -211,14 +435,48 @@ class QATestExecutor:
             self.log_test_result(test_id, 'FAILED', details)
             return False
 
+    @staticmethod
+    def _file_sha256(path):
+        """分块计算文件的SHA-256，避免一次性读入整个视频"""
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _load_video_digests(self):
+        """读取已下载视频的SHA-256记录 {video_id: digest}"""
+        try:
+            with open(self.test_dirs['videos'] / VIDEO_DIGEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_video_digests(self, digests):
+        """保存已下载视频的SHA-256记录"""
+        try:
+            with open(self.test_dirs['videos'] / VIDEO_DIGEST_FILE, 'w', encoding='utf-8') as f:
+                json.dump(digests, f, indent=2)
+        except OSError as e:
+            logger.warning(f"无法写入视频校验记录: {e}")
+
     def download_test_video(self, video_type):
         """辅助功能：下载测试视频"""
         video_info = self.test_videos[video_type]
         video_path = self.test_dirs['videos'] / video_info['local_filename']
         
+        digests = self._load_video_digests()
         if video_path.exists():
-            logger.info(f"视频文件已存在: {video_path}")
-            return str(video_path)
+            digest = self._file_sha256(video_path)
+            expected = digests.get(video_info['video_id'])
+            if expected is None or expected == digest:
+                if expected is None:
+                    digests[video_info['video_id']] = digest
+                    self._save_video_digests(digests)
+                logger.info(f"视频文件已存在且校验通过: {video_path}")
+                return str(video_path)
+            logger.warning(f"视频文件校验失败，重新下载: {video_path}")
+            video_path.unlink()
         
         logger.info(f"尝试下载{video_info['description']}: {video_info['url']}")
         
@@ -240,6 +498,8 @@ class QATestExecutor:
             if result.returncode == 0 and video_path.exists():
                 file_size = video_path.stat().st_size / (1024 * 1024)  # MB
                 logger.info(f"下载成功: {video_path} ({file_size:.1f} MB)")
+                digests[video_info['video_id']] = self._file_sha256(video_path)
+                self._save_video_digests(digests)
                 return str(video_path)
             else:
                 logger.error(f"下载失败: {result.stderr}")
@@ -255,6 +515,60 @@ class QATestExecutor:
             logger.error(f"下载过程出错: {e}")
             return None
 
+    def _invoke_cli(self, args, timeout):
+        """
+        在当前进程内通过 CliRunner 调用 CLI，省去子进程的解释器启动和模块导入
+        
+        CLI 无法导入时回退到子进程。返回 subprocess.CompletedProcess，
+        超时抛出 subprocess.TimeoutExpired。
+        """
+        try:
+            from typer.testing import CliRunner
+            sys.path.insert(0, str(Path(__file__).parent.parent))
+            from src.gs_video_report.cli import app as cli_app
+        except Exception as e:
+            logger.warning(f"无法在进程内加载CLI，改用子进程: {e}")
+            return subprocess.run(
+                [sys.executable, '-m', 'src.gs_video_report.cli', *args],
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+        
+        try:
+            runner = CliRunner(mix_stderr=False)
+        except TypeError:  # 新版click默认分离stderr
+            runner = CliRunner()
+        
+        # 在线程中执行以保留超时控制；超时后该线程无法被强制终止，只是不再等待
+        pool = ThreadPoolExecutor(max_workers=1)
+        try:
+            invoke_result = pool.submit(runner.invoke, cli_app, args).result(timeout=timeout)
+        except FuturesTimeoutError:
+            raise subprocess.TimeoutExpired(args, timeout)
+        finally:
+            pool.shutdown(wait=False)
+        
+        try:
+            stderr = invoke_result.stderr
+        except ValueError:  # stderr 未单独捕获
+            stderr = ''
+        return subprocess.CompletedProcess(args, invoke_result.exit_code, invoke_result.stdout, stderr)
+
+    @staticmethod
+    def _latest_output_since(output_dir, since_ts):
+        """一次遍历输出目录，返回 since_ts 之后修改的最新 .md 文件（没有则返回 None）"""
+        latest = None
+        latest_mtime = since_ts
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.md') or not entry.is_file():
+                    continue
+                mtime = entry.stat().st_mtime
+                if mtime >= latest_mtime:
+                    latest, latest_mtime = entry.path, mtime
+        return Path(latest) if latest else None
+
     def test_chinese_transcript_template(self, video_path=None):
         """TC003: 中文转录模板功能测试"""
         test_id = "TC003"
@@ -267,13 +581,13 @@ class QATestExecutor:
                 self.log_test_result(test_id, 'SKIPPED', '无可用测试视频文件')
                 return False
         
-        start_time = time.time()
+        start_time = time.monotonic()
         
         try:
             # 使用中文转录模板分析视频
             output_dir = self.test_dirs['output']
-            cmd = [
-                sys.executable, '-m', 'src.gs_video_report.cli', 'main',
+            args = [
+                'main',
                 video_path,
                 '--template', 'chinese_transcript',
                 '--output', str(output_dir),
@@ -281,25 +595,20 @@ class QATestExecutor:
                 '--verbose'
             ]
             
-            logger.info(f"执行命令: {' '.join(cmd)}")
+            logger.info(f"执行命令: gs_videoreport {' '.join(args)}")
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=900  # 15分钟超时
-            )
+            dispatch_ts = time.time()
+            result = self._invoke_cli(args, timeout=900)  # 15分钟超时
             
-            processing_time = time.time() - start_time
+            processing_time = time.monotonic() - start_time
             
             logger.info(f"处理时间: {processing_time:.2f}秒")
             logger.info(f"退出代码: {result.returncode}")
             
             if result.returncode == 0:
-                # 检查输出文件
-                output_files = list(output_dir.glob("*.md"))
-                if output_files:
-                    output_file = output_files[-1]  # 最新的输出文件
+                # 检查输出文件：只考虑本次调用之后写入的文件，取最新的一个
+                output_file = self._latest_output_since(output_dir, dispatch_ts)
+                if output_file:
                     
                     # 验证输出格式
                     content = output_file.read_text(encoding='utf-8')
@@ -321,7 +630,7 @@ class QATestExecutor:
                         self.log_test_result(test_id, 'FAILED', details, performance)
                         return False
                 else:
-                    details = "模板执行完成但未生成输出文件"
+                    details = "模板执行完成但未生成新的输出文件"
                     self.log_test_result(test_id, 'FAILED', details, {'processing_time': processing_time})
                     return False
             else:
@@ -342,14 +651,22 @@ class QATestExecutor:
 
     def _validate_chinese_transcript_format(self, content):
         """验证中文转录输出格式"""
+        found = set()
+        for match in FORMAT_MARKER_RE.finditer(content):
+            found.add(match.lastgroup)
+            if len(found) == len(FORMAT_MARKERS):
+                break
+        if found & {'basic_info', 'transcript_content'}:
+            found.add('title_marker')
+        
         checks = {
             'has_yaml_frontmatter': content.startswith('---\n') and '\n---\n' in content,
-            'has_video_title': '# ' in content and '中文逐字稿分析' in content,
-            'has_basic_info': '## 基本信息' in content,
-            'has_transcript_content': '## 逐字稿内容' in content,
-            'has_first_person_summary': '第一人称' in content,
-            'has_key_terms': '关键术语' in content or '术语' in content,
-            'has_timestamps': '[' in content and ']' in content,  # 检查时间戳格式
+            'has_video_title': 'title_marker' in found and 'title_text' in found,
+            'has_basic_info': 'basic_info' in found,
+            'has_transcript_content': 'transcript_content' in found,
+            'has_first_person_summary': 'first_person' in found,
+            'has_key_terms': 'key_terms' in found or 'terms' in found,
+            'has_timestamps': 'open_bracket' in found and 'close_bracket' in found,  # 检查时间戳格式
             'is_utf8_encoded': True  # 文件已成功读取，说明编码正确
         }
         
@@ -360,19 +677,35 @@ class QATestExecutor:
 
     def generate_test_report(self):
         """生成测试报告"""
-        self.test_results['end_time'] = datetime.now().isoformat()
+        try:
+            return self._generate_test_report()
+        finally:
+            if self._probe_pool is not None:
+                self._probe_pool.shutdown(wait=False)
+                self._probe_pool = None
+            # 确保报告相关日志在返回前全部写出
+            _flush_log_queue()
+
+    def _generate_test_report(self):
+        self.test_results['end_time'] = _now_iso()
+        
+        status_counts = Counter(tc['status'] for tc in self.test_results['test_cases'].values())
+        self.test_results['summary'] = {
+            'total': sum(status_counts.values()),
+            'passed': status_counts['PASSED'],
+            'failed': status_counts['FAILED'],
+            'skipped': status_counts['SKIPPED']
+        }
         
         # 计算总执行时间
-        start = datetime.fromisoformat(self.test_results['start_time'])
-        end = datetime.fromisoformat(self.test_results['end_time'])
-        duration = (end - start).total_seconds()
+        # 使用单调时钟计算耗时，不受系统时间调整影响；ISO时间戳仅用于报告展示
+        duration = time.monotonic() - self._t0
         
         self.test_results['execution_time'] = f"{duration:.2f} seconds"
         
         # 保存详细结果
         report_file = Path('tests/qa_test_results.json')
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(self.test_results, f, indent=2, ensure_ascii=False)
+        dump_json(self.test_results, report_file)
         
         # 生成简要报告
         logger.info("=" * 60)
@@ -401,11 +734,12 @@ class QATestExecutor:
             logger.error("关键依赖检查失败，终止测试")
             return self.generate_test_report()
         
-        # TC001: 公共视频访问测试
-        public_accessible = self.test_video_accessibility('public')
-        
-        # TC002: 私有视频访问测试  
-        self.test_video_accessibility('private')
+        # TC001/TC002: 公共/私有视频访问测试（两个HEAD请求互不依赖，并发执行）
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            public_future = pool.submit(self.test_video_accessibility, 'public')
+            private_future = pool.submit(self.test_video_accessibility, 'private')
+            public_accessible = public_future.result()
+            private_future.result()
         
         # TC003: 中文转录模板测试
         if download_videos and public_accessible:
@@ -422,10 +756,11 @@ def main():
     parser = argparse.ArgumentParser(description='执行QA测试')
     parser.add_argument('--download', action='store_true', help='下载视频进行完整测试')
     parser.add_argument('--test-case', help='执行特定测试用例 (如: TC001)')
+    parser.add_argument('--no-dep-cache', action='store_true', help='忽略依赖检查缓存，重新检查所有依赖')
     
     args = parser.parse_args()
     
-    executor = QATestExecutor()
+    executor = QATestExecutor(use_dep_cache=not args.no_dep_cache)
     
     if args.test_case:
         # 执行特定测试用例
@@ -4,31 +4,53 @@
 快速执行关键测试用例并生成测试报告
 """
 
+import io
 import subprocess
 import sys
-import json
+import threading
 import time
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Any
 
+# 共用的报告读写工具位于 tests 包内，作为脚本运行时需把项目根目录加入 sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from tests._json_util import dump_json
+
 
 class BatchQATestRunner:
     """批量处理QA测试执行器"""
     
-    def __init__(self):
+    def __init__(self, in_process: bool = False):
+        """
+        Args:
+            in_process: 为True时在当前进程内调用 pytest.main()，省去每个用例的解释器启动开销，
+                但无法强制超时且只能串行；默认每个用例在独立的pytest子进程中执行（5分钟超时）
+        """
         self.project_root = Path(__file__).parent.parent
+        self.in_process = in_process
         self.test_results = []
         self.start_time = None
         self.end_time = None
+        self.aborted = False
+        # pytest.main() 和输出重定向都是进程全局的，进程内执行需串行
+        self._pytest_lock = threading.Lock()
     
-    def run_test_suite(self) -> Dict[str, Any]:
-        """执行完整的QA测试套件"""
+    def run_test_suite(self, parallel: int = 1, fail_fast: bool = False) -> Dict[str, Any]:
+        """
+        执行完整的QA测试套件
+        
+        Args:
+            parallel: 并发执行的测试用例数，1 为串行执行
+            fail_fast: 为True时任一HIGH优先级用例未通过即取消尚未开始的用例（记为SKIPPED）
+        """
         
         print("🔍 QA Agent - 开始执行批量处理功能测试套件")
         print("=" * 60)
         
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         
         # 定义测试用例套件
         test_cases = [
@@ -90,12 +112,34 @@ class BatchQATestRunner:
             }
         ]
         
-        # 执行每个测试用例
-        for test_case in test_cases:
-            result = self._run_single_test(test_case)
-            self.test_results.append(result)
-        
-        self.end_time = time.time()
+        # HIGH优先级用例先执行（稳定排序，同优先级保持定义顺序）
+        test_cases.sort(key=lambda t: 0 if t['priority'] == 'HIGH' else 1)
+        
+        # 执行每个测试用例（可用线程并发调度）
+        results: List[Dict[str, Any]] = [None] * len(test_cases)
+        aborted = False
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+            futures = {executor.submit(self._run_single_test, test_case): index
+                       for index, test_case in enumerate(test_cases)}
+            for future in as_completed(futures):
+                index = futures[future]
+                if future.cancelled():
+                    results[index] = self._skipped_result(test_cases[index])
+                    continue
+                result = results[index] = future.result()
+                if (fail_fast and not aborted and result['status'] != 'PASS'
+                        and result['test_case']['priority'] == 'HIGH'):
+                    aborted = True
+                    print(f"\n⛔ 关键测试未通过，取消剩余用例: {result['test_case']['name']}")
+                    # 已在执行的用例会继续完成，未开始的用例被取消
+                    for pending in futures:
+                        pending.cancel()
+        self.aborted = aborted
+        
+        # 按执行顺序汇总结果
+        self.test_results.extend(results)
+        
+        self.end_time = time.monotonic()
         
         # 生成测试报告
         report = self._generate_test_report()
@@ -105,6 +149,18 @@ class BatchQATestRunner:
         
         return report
     
+    @staticmethod
+    def _skipped_result(test_case: Dict[str, str]) -> Dict[str, Any]:
+        """fail-fast 取消的用例仍写入报告，状态为SKIPPED"""
+        return {
+            'test_case': test_case,
+            'status': 'SKIPPED',
+            'duration_seconds': 0,
+            'stdout': '',
+            'stderr': 'Cancelled by --fail-fast',
+            'return_code': None
+        }
+    
     def _run_single_test(self, test_case: Dict[str, str]) -> Dict[str, Any]:
         """执行单个测试用例"""
         
@@ -113,22 +169,13 @@ class BatchQATestRunner:
         print(f"\n🧪 执行: {test_case['name']}")
         print(f"   📋 类别: {test_case['category']} | 优先级: {test_case['priority']}")
         
-        start_time = time.time()
+        start_time = time.monotonic()
         
         try:
             # 执行pytest命令
-            result = subprocess.run([
-                sys.executable, "-m", "pytest",
-                f"tests/{test_identifier}",
-                "-v", "--tb=short", "--no-header"
-            ], 
-            cwd=self.project_root,
-            capture_output=True, 
-            text=True,
-            timeout=300  # 5分钟超时
-            )
+            result = self._invoke_pytest(test_identifier)
             
-            end_time = time.time()
+            end_time = time.monotonic()
             duration = end_time - start_time
             
             # 解析测试结果
@@ -171,6 +218,33 @@ class BatchQATestRunner:
                 'return_code': -1
             }
     
+    def _invoke_pytest(self, test_identifier: str) -> subprocess.CompletedProcess:
+        """运行单个pytest用例，返回与 subprocess.run 相同结构的结果"""
+        if not self.in_process:
+            return subprocess.run([
+                sys.executable, "-m", "pytest",
+                f"tests/{test_identifier}",
+                "-v", "--tb=short", "--no-header"
+            ], 
+            cwd=self.project_root,
+            capture_output=True, 
+            text=True,
+            timeout=300  # 5分钟超时
+            )
+        
+        # 进程内执行：无法强制超时，仅在显式指定 --in-process 时使用
+        import pytest
+        
+        buf_out, buf_err = io.StringIO(), io.StringIO()
+        with self._pytest_lock, redirect_stdout(buf_out), redirect_stderr(buf_err):
+            return_code = int(pytest.main([
+                str(self.project_root / "tests" / test_identifier),
+                "-v", "--tb=short", "--no-header",
+                "--rootdir", str(self.project_root)
+            ]))
+        return subprocess.CompletedProcess(test_identifier, return_code,
+                                           buf_out.getvalue(), buf_err.getvalue())
+    
     def _generate_test_report(self) -> Dict[str, Any]:
         """生成详细的测试报告"""
         
@@ -181,6 +255,7 @@ class BatchQATestRunner:
         passed_tests = len([r for r in self.test_results if r['status'] == 'PASS'])
         failed_tests = len([r for r in self.test_results if r['status'] == 'FAIL'])
         error_tests = len([r for r in self.test_results if r['status'] in ['ERROR', 'TIMEOUT']])
+        skipped_tests = len([r for r in self.test_results if r['status'] == 'SKIPPED'])
         
         # 按类别分组
         category_stats = {}
@@ -222,6 +297,7 @@ class BatchQATestRunner:
                     'passed': passed_tests,
                     'failed': failed_tests,
                     'errors': error_tests,
+                    'skipped': skipped_tests,
                     'pass_rate': passed_tests / total_tests if total_tests > 0 else 0,
                     'overall_status': 'PASS' if failed_tests == 0 and error_tests == 0 else 'FAIL'
                 },
@@ -234,8 +310,7 @@ class BatchQATestRunner:
         
         # 保存报告到文件
         report_file = self.project_root / "tests" / f"qa_batch_test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        dump_json(report, report_file)
         
         print(f"\n📄 详细测试报告已保存: {report_file}")
         
@@ -286,6 +361,9 @@ class BatchQATestRunner:
         print(f"📈 总计测试: {total_tests}")
         print(f"✅ 通过: {passed_tests}")
         print(f"❌ 失败: {failed_tests}")
+        skipped_tests = len([r for r in self.test_results if r['status'] == 'SKIPPED'])
+        if skipped_tests:
+            print(f"⏭️ 跳过: {skipped_tests} (--fail-fast)")
         print(f"📊 通过率: {passed_tests/total_tests:.1%}")
         print(f"⏱️ 总耗时: {self.end_time - self.start_time:.2f}秒")
         
@@ -325,15 +403,28 @@ class BatchQATestRunner:
 
 def main():
     """主执行函数"""
-    runner = BatchQATestRunner()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='批量处理功能QA测试')
+    parser.add_argument('--smoke', action='store_true', help='仅执行快速冒烟测试')
+    parser.add_argument('--parallel', type=int, default=1,
+                        help='并发执行的测试用例数 (默认1，串行；--in-process 模式下实际串行执行)')
+    parser.add_argument('--in-process', action='store_true',
+                        help='在当前进程内调用pytest.main()执行用例（更快，但无超时保护）')
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='HIGH优先级用例未通过时取消剩余用例')
+    args = parser.parse_args()
+    
+    runner = BatchQATestRunner(in_process=args.in_process)
     
-    if len(sys.argv) > 1 and sys.argv[1] == "--smoke":
+    if args.smoke:
         # 快速冒烟测试
         return runner.run_quick_smoke_test()
     else:
         # 完整测试套件
-        runner.run_test_suite()
-        return True
+        runner.run_test_suite(parallel=args.parallel, fail_fast=args.fail_fast)
+        # fail-fast 中止时返回非零退出码
+        return not runner.aborted
 
 
 if __name__ == "__main__":
@@ -4,40 +4,152 @@
 使用test_videos目录中的20个真实Figma教程视频进行完整验证
 """
 
+import os
 import subprocess
 import sys
-import json
+import selectors
 import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+# json/orjson、datetime、tempfile 只在完整测试套件中用到，延迟到使用处导入，
+# 使 --quick 快速验证模式启动更快；共用的报告读写工具位于 tests 包内，
+# 作为脚本运行时需把项目根目录加入 sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# pytest自身输出只保留最后若干行用于诊断
+OUTPUT_TAIL_LINES = 200
+
+# 报告中每个用例的 stdout/stderr 只保留最后 64 KiB（字符），性能信息在输出末尾
+REPORT_OUTPUT_LIMIT = 64 * 1024
+
+# 性能基准测试把指标写入 tests/ 下的JSON文件，执行器直接读取，无需解析测试输出
+BENCHMARK_METHOD = 'test_real_video_performance_benchmark'
+BENCHMARK_FILE = 'real_video_performance_benchmark.json'
+PERFORMANCE_KEYS = {'吞吐量:': 'throughput_info',
+                    '总处理时间:': 'total_duration_info',
+                    '平均每视频:': 'avg_per_video_info'}
+
+# 增量模式缓存：保存上次通过的用例结果，视频、测试模块和被测源码未变化时直接复用
+QA_CACHE_FILE = '.qa_cache.json'
+
+# 质量评估关注的核心功能（按测试方法名匹配）
+CORE_FUNCTIONS = ('error_isolation', 'retry_mechanism', 'performance_benchmark')
+
+
+@dataclass
+class Stats:
+    """一次遍历测试结果得到的汇总统计"""
+    status_counts: Counter = field(default_factory=Counter)
+    # (优先级, 状态) -> 用例数
+    priority_counts: Counter = field(default_factory=Counter)
+    method_flags: Dict[str, bool] = field(default_factory=lambda: dict.fromkeys(CORE_FUNCTIONS, False))
+    # 未通过的用例（按执行顺序）
+    failed_cases: List[Dict[str, str]] = field(default_factory=list)
+    # 性能测试：是否执行、最长的性能测试耗时、从输出中提取的性能信息
+    performance_executed: bool = False
+    longest_performance_duration: float = 0.0
+    performance_insights: Dict[str, str] = field(default_factory=dict)
+    
+    @property
+    def total(self) -> int:
+        return sum(self.status_counts.values())
+    
+    @property
+    def passed(self) -> int:
+        return self.status_counts['PASS']
+    
+    @property
+    def failed(self) -> int:
+        return self.status_counts['FAIL']
+    
+    @property
+    def error_timeout(self) -> int:
+        return self.status_counts['ERROR'] + self.status_counts['TIMEOUT']
+    
+    def priority_total(self, priority: str) -> int:
+        return sum(n for (p, _), n in self.priority_counts.items() if p == priority)
+    
+    def priority_passed(self, priority: str) -> int:
+        return self.priority_counts[(priority, 'PASS')]
+
+@dataclass
+class PytestRun:
+    """一个pytest子进程（执行一组用例）的运行状态"""
+    test_cases: List[Dict[str, str]]
+    junit_file: Path
+    timeout: int
+    proc: Optional[subprocess.Popen] = None
+    started: float = 0.0
+    started_at: str = ''  # 启动时间（ISO格式），作为该组用例的执行时间戳
+    deadline: float = 0.0
+    duration: float = 0.0
+    return_code: int = -1
+    timed_out: bool = False
+    error: Optional[str] = None
+    # pytest自身输出的最后若干行，以及尚未遇到换行符的残余字节
+    lines: deque = field(default_factory=lambda: deque(maxlen=OUTPUT_TAIL_LINES))
+    partial: bytes = b''
+    
+    def feed(self, chunk: bytes) -> None:
+        *complete, self.partial = (self.partial + chunk).split(b'\n')
+        self.lines.extend(complete)
+    
+    def tail(self) -> str:
+        return b'\n'.join([*self.lines, self.partial]).decode('utf-8', errors='replace')
 
 
 class RealVideoQATestRunner:
     """基于真实视频的QA测试执行器"""
     
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None, incremental: bool = False):
+        """
+        Args:
+            workers: 并发的pytest子进程数，默认 min(用例数, CPU核数)；
+                为1时所有用例在同一个pytest进程中执行
+            incremental: 为True时复用缓存中输入未变化的已通过用例结果
+        """
         self.project_root = Path(__file__).parent.parent
+        self.workers = workers or os.cpu_count() or 1
+        self.incremental = incremental
+        self._cache_path = self.project_root / "tests" / QA_CACHE_FILE
+        # pytest子进程环境只构造一次：不写 .pyc、固定哈希种子（用户环境变量优先）
+        self._pytest_env = {'PYTHONDONTWRITEBYTECODE': '1', 'PYTHONHASHSEED': '0', **os.environ}
         self.test_videos_dir = self.project_root / "test_videos"
         self.test_results = []
         self.start_time = None
         self.end_time = None
+        self._stats: Optional[Stats] = None
+        self._source_signature: Optional[List[int]] = None
         
         # 验证真实视频文件
         self._validate_real_videos()
     
     def _validate_real_videos(self):
-        """验证真实视频文件的存在性"""
+        """验证真实视频文件的存在性，返回视频文件数量"""
         if not self.test_videos_dir.exists():
             print("❌ test_videos目录不存在，无法进行真实视频测试")
             sys.exit(1)
         
-        video_files = list(self.test_videos_dir.glob("*.mp4"))
-        if len(video_files) != 20:
-            print(f"⚠️ 期望20个视频文件，实际找到{len(video_files)}个")
-        
-        print(f"✅ 找到 {len(video_files)} 个真实Figma教程视频文件")
-        return video_files
+        # 用 os.scandir 按扩展名过滤，不为每个文件构造 Path 对象；
+        # 同一次扫描记录最新修改时间，作为增量模式的视频输入签名
+        video_count = 0
+        latest_mtime = 0
+        with os.scandir(self.test_videos_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.mp4') and entry.is_file(follow_symlinks=False):
+                    video_count += 1
+                    latest_mtime = max(latest_mtime, entry.stat(follow_symlinks=False).st_mtime_ns)
+        self._video_count = video_count
+        self._video_signature = [video_count, latest_mtime]
+        
+        if video_count != 20:
+            print(f"⚠️ 期望20个视频文件，实际找到{video_count}个")
+        
+        print(f"✅ 找到 {video_count} 个真实Figma教程视频文件")
+        return video_count
     
     def run_comprehensive_qa_suite(self) -> Dict[str, Any]:
         """执行基于真实视频的完整QA测试套件"""
@@ -45,7 +157,7 @@ class RealVideoQATestRunner:
         print("🎬 QA Agent - 开始执行基于真实Figma视频的批量处理测试")
         print("=" * 70)
         
-        self.start_time = time.time()
+        self.start_time = time.monotonic()  # 耗时统计使用单调时钟，不受系统时间调整影响
         
         # 定义真实视频测试用例套件
         real_video_test_cases = [
@@ -96,12 +208,46 @@ class RealVideoQATestRunner:
             }
         ]
         
-        # 执行每个测试用例
-        for test_case in real_video_test_cases:
-            result = self._run_single_test(test_case)
-            self.test_results.append(result)
+        cache = self._load_qa_cache()
+        signatures = {self._test_identifier(tc): self._input_signature(tc) for tc in real_video_test_cases}
+        results_by_method = {}
+        pending_cases = real_video_test_cases
+        if self.incremental:
+            pending_cases = []
+            for tc in real_video_test_cases:
+                entry = cache.get(self._test_identifier(tc))
+                if entry is not None and entry['signature'] == signatures[self._test_identifier(tc)]:
+                    print(f"\n♻️ 复用缓存结果: {tc['name']} (视频、测试模块和源码均未变化)")
+                    results_by_method[tc['method']] = dict(entry['result'], test_case=tc, cached=True)
+                else:
+                    pending_cases.append(tc)
+        
+        # 用例按 workers 分组，每组在一个pytest子进程中执行，各组并发（结果保持定义顺序）；
+        # 性能基准的计时会被并发用例干扰，待其他用例全部结束后单独执行
+        benchmark_cases = [tc for tc in pending_cases if tc['method'] == BENCHMARK_METHOD]
+        other_cases = [tc for tc in pending_cases if tc['method'] != BENCHMARK_METHOD]
+        if other_cases:
+            workers = max(1, min(self.workers, len(other_cases)))
+            batches = [other_cases[i::workers] for i in range(workers)]
+            batch_results = self._run_test_batches(batches)
+            results_by_method.update((r['test_case']['method'], r) for batch in batch_results for r in batch)
+        if benchmark_cases:
+            batch_results = self._run_test_batches([benchmark_cases])
+            results_by_method.update((r['test_case']['method'], r) for batch in batch_results for r in batch)
+        self.test_results.extend(results_by_method[tc['method']] for tc in real_video_test_cases)
+        
+        # 只缓存通过的用例，失败的用例下次总是重新执行
+        for result in self.test_results:
+            identifier = self._test_identifier(result['test_case'])
+            if result['status'] == 'PASS':
+                cache[identifier] = {'signature': signatures[identifier],
+                                     'result': self._truncate_output(result)}
+            else:
+                cache.pop(identifier, None)
+        self._save_qa_cache(cache)
         
-        self.end_time = time.time()
+        self.end_time = time.monotonic()
+        self._stats = None
         
         # 生成详细报告
         report = self._generate_comprehensive_report()
@@ -111,88 +257,345 @@ class RealVideoQATestRunner:
         
         return report
     
-    def _run_single_test(self, test_case: Dict[str, str]) -> Dict[str, Any]:
-        """执行单个真实视频测试用例"""
-        
-        test_identifier = f"{test_case['module']}::{test_case['class']}::{test_case['method']}"
-        
-        print(f"\n🧪 执行: {test_case['name']}")
-        print(f"   📋 {test_case['description']}")
-        print(f"   🏷️  类别: {test_case['category']} | 优先级: {test_case['priority']}")
+    @staticmethod
+    def _test_identifier(test_case: Dict[str, str]) -> str:
+        return f"{test_case['module']}::{test_case['class']}::{test_case['method']}"
+    
+    def _input_signature(self, test_case: Dict[str, str]) -> List[int]:
+        """用例输入签名：视频数量、视频最新修改时间、测试模块修改时间和被测源码签名"""
+        module_path = self.project_root / "tests" / test_case['module']
+        try:
+            module_mtime = module_path.stat().st_mtime_ns
+        except OSError:
+            module_mtime = 0
+        if self._source_signature is None:
+            self._source_signature = self._compute_source_signature()
+        return [*self._video_signature, module_mtime, *self._source_signature]
+    
+    def _compute_source_signature(self) -> List[int]:
+        """被测代码签名：src/ 下文件数量、最新修改时间和 config.yaml 修改时间，代码或配置变化时缓存失效"""
+        file_count = latest_mtime = 0
+        for root, dirs, files in os.walk(self.project_root / "src"):
+            dirs[:] = [d for d in dirs if d != '__pycache__']
+            for name in files:
+                try:
+                    mtime = os.stat(os.path.join(root, name)).st_mtime_ns
+                except OSError:
+                    continue
+                file_count += 1
+                if mtime > latest_mtime:
+                    latest_mtime = mtime
+        try:
+            config_mtime = (self.project_root / "config.yaml").stat().st_mtime_ns
+        except OSError:
+            config_mtime = 0
+        return [file_count, latest_mtime, config_mtime]
+    
+    def _load_qa_cache(self) -> Dict[str, Any]:
+        """读取增量模式缓存，文件不存在或损坏时返回空缓存"""
+        import json
         
-        start_time = time.time()
+        try:
+            with open(self._cache_path, encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+    
+    def _save_qa_cache(self, cache: Dict[str, Any]) -> None:
+        """原子写入增量模式缓存，运行中断时不会留下截断的缓存文件"""
+        from tests._json_util import dump_json
         
         try:
-            # 执行pytest命令
-            result = subprocess.run([
-                sys.executable, "-m", "pytest",
-                f"tests/{test_identifier}",
-                "-v", "--tb=short", "--no-header", "-s"  # -s显示print输出
-            ], 
-            cwd=self.project_root,
-            capture_output=True, 
-            text=True,
-            timeout=600  # 10分钟超时（真实视频测试可能较慢）
-            )
-            
-            end_time = time.time()
-            duration = end_time - start_time
-            
-            # 解析测试结果
-            if result.returncode == 0:
-                status = "PASS"
-                print(f"   ✅ 通过 ({duration:.2f}s)")
-                
-                # 提取有用的输出信息
-                if "真实视频性能基准测试通过" in result.stdout:
-                    performance_lines = [line.strip() for line in result.stdout.split('\n') 
-                                       if line.strip().startswith(('📊', '⏱️', '🚀', '📈', '📄'))]
-                    for line in performance_lines:
-                        print(f"     {line}")
-                        
-            else:
-                status = "FAIL"
-                print(f"   ❌ 失败 ({duration:.2f}s)")
+            dump_json(cache, self._cache_path)
+        except OSError as e:
+            print(f"⚠️ 无法写入QA缓存 {self._cache_path}: {e}")
+    
+    def _run_test_batches(self, batches: List[List[Dict[str, str]]]) -> List[List[Dict[str, Any]]]:
+        """
+        一次性启动所有分组的pytest子进程，并用 selectors 统一读取输出、回收进程
+        
+        每组在一个pytest子进程中执行，同一进程内只需一次解释器启动和模块导入；
+        各用例的状态、耗时和输出从 --junitxml 结果中解析。总耗时约等于最慢分组的耗时。
+        """
+        import tempfile
+        from contextlib import ExitStack
+        from datetime import datetime
+        
+        with ExitStack() as stack:
+            runs = []
+            for test_cases in batches:
+                # 每组输出用一次print写出
+                print("".join(f"\n🧪 执行: {tc['name']}\n"
+                              f"   📋 {tc['description']}\n"
+                              f"   🏷️  类别: {tc['category']} | 优先级: {tc['priority']}"
+                              for tc in test_cases))
                 
-                # 显示关键错误信息
-                if result.stderr:
-                    error_lines = result.stderr.strip().split('\n')[-3:]  # 最后3行错误
-                    for line in error_lines:
-                        if line.strip():
-                            print(f"   🔍 {line.strip()}")
+                # 子进程在项目根目录下执行（用例按项目相对路径加载模板等资源），
+                # 临时目录只存放各组的JUnit结果；状态文件由各用例写入自己的 state_dir，并发分组互不干扰
+                work_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="qa_real_video_"))
+                run = PytestRun(test_cases=test_cases,
+                                junit_file=Path(work_dir) / "junit.xml",
+                                timeout=600 * len(test_cases))  # 每个用例10分钟（真实视频测试可能较慢）
+                try:
+                    run.proc = subprocess.Popen(self._pytest_command(test_cases, run.junit_file),
+                                                cwd=self.project_root, env=self._pytest_env,
+                                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                except OSError as e:
+                    run.error = str(e)
+                run.started = time.monotonic()
+                run.started_at = datetime.now().isoformat()
+                run.deadline = run.started + run.timeout
+                runs.append(run)
             
-            return {
-                'test_case': test_case,
-                'status': status,
-                'duration_seconds': duration,
-                'stdout': result.stdout,
-                'stderr': result.stderr,
-                'return_code': result.returncode,
-                'execution_timestamp': datetime.now().isoformat()
-            }
-            
-        except subprocess.TimeoutExpired:
-            print(f"   ⏱️ 超时 (>10分钟)")
-            return {
+            self._reap_pytest(runs)
+            return [self._collect_batch_results(run) for run in runs]
+    
+    def _pytest_command(self, test_cases: List[Dict[str, str]], junit_file: Path) -> List[str]:
+        """构造执行一组用例的pytest命令"""
+        node_ids = [str(self.project_root / "tests" / f"{tc['module']}::{tc['class']}::{tc['method']}")
+                    for tc in test_cases]
+        return [
+            sys.executable, "-m", "pytest",
+            *node_ids,
+            "-q", "--tb=line", "--no-header",  # 结果来自JUnit XML，pytest自身输出只用于诊断
+            "--rootdir", str(self.project_root),
+            "-p", "no:cacheprovider",  # 并发进程不共享 .pytest_cache
+            "--junitxml", str(junit_file),
+            "-o", "junit_logging=system-out"  # 每个用例的print输出写入JUnit结果
+        ]
+    
+    @staticmethod
+    def _reap_pytest(runs: List['PytestRun']) -> None:
+        """
+        在单线程中读取所有子进程的输出管道，直到全部结束或超时
+        
+        用例结果和输出已写入JUnit XML，这里的输出仅用于诊断（如收集错误），
+        每个进程只保留最后 OUTPUT_TAIL_LINES 行。超过各自期限的进程被终止并标记超时。
+        """
+        selector = selectors.DefaultSelector()
+        for run in runs:
+            if run.proc is not None:
+                selector.register(run.proc.stdout, selectors.EVENT_READ, run)
+        
+        def _finish(key: selectors.SelectorKey) -> None:
+            selector.unregister(key.fileobj)
+            key.fileobj.close()
+            key.data.return_code = key.data.proc.wait()
+            key.data.duration = time.monotonic() - key.data.started
+        
+        try:
+            while selector.get_map():
+                now = time.monotonic()
+                for key in list(selector.get_map().values()):
+                    if now >= key.data.deadline:
+                        key.data.timed_out = True
+                        key.data.proc.kill()
+                        _finish(key)
+                if not selector.get_map():
+                    break
+                
+                wait = min(key.data.deadline for key in selector.get_map().values()) - now
+                for key, _ in selector.select(timeout=max(wait, 0)):
+                    chunk = os.read(key.fd, 65536)
+                    if chunk:
+                        key.data.feed(chunk)
+                    else:
+                        _finish(key)
+        finally:
+            for key in list(selector.get_map().values()):
+                key.data.proc.kill()
+                _finish(key)
+            selector.close()
+    
+    def _collect_batch_results(self, run: 'PytestRun') -> List[Dict[str, Any]]:
+        """根据子进程退出状态和JUnit结果生成该组各用例的结果"""
+        test_cases = run.test_cases
+        timeout = run.timeout
+        execution_timestamp = run.started_at
+        if run.timed_out:
+            print(f"   ⏱️ 超时 (>{timeout // 60}分钟): {', '.join(tc['name'] for tc in test_cases)}")
+            return [{
                 'test_case': test_case,
                 'status': 'TIMEOUT', 
-                'duration_seconds': 600,
-                'stdout': '',
-                'stderr': 'Test execution timeout (10 minutes)',
+                'duration_seconds': timeout,
+                'stdout': run.tail(),  # 超时前的最后若干行输出
+                'stderr': f'Test execution timeout ({timeout // 60} minutes)',
                 'return_code': -1,
-                'execution_timestamp': datetime.now().isoformat()
-            }
+                'execution_timestamp': execution_timestamp
+            } for test_case in test_cases]
+        
+        try:
+            if run.error is not None:
+                raise RuntimeError(run.error)
+            junit_cases = self._parse_junit_results(run.junit_file)
         except Exception as e:
             print(f"   💥 执行异常: {str(e)}")
-            return {
+            return [{
                 'test_case': test_case,
                 'status': 'ERROR',
                 'duration_seconds': 0,
                 'stdout': '',
                 'stderr': str(e),
                 'return_code': -1,
-                'execution_timestamp': datetime.now().isoformat()
+                'execution_timestamp': execution_timestamp
+            } for test_case in test_cases]
+        
+        batch_duration = run.duration
+        return_code = run.return_code
+        output_tail = run.tail().strip()
+        results = []
+        output = []
+        for test_case in test_cases:
+            case = junit_cases.get(f"{test_case['class']}::{test_case['method']}")
+            if case is None:
+                # 未被收集或执行（如导入错误），使用pytest自身的输出作为错误信息
+                case = {
+                    'status': 'FAIL',
+                    'duration': batch_duration,
+                    'stdout': '',
+                    'message': output_tail
+                }
+            
+            name = test_case['name']
+            status = case['status']
+            duration = case['duration']
+            stdout = case['stdout']
+            message = case['message']
+            performance_lines = []
+            if status == "PASS":
+                output.append(f"   ✅ {name} 通过 ({duration:.2f}s)")
+                
+                # 读取性能基准指标，报告阶段复用同一结果
+                if test_case['method'] == BENCHMARK_METHOD:
+                    performance_lines = self._load_benchmark_lines(run.started_at)
+                    output.extend(f"     {line}" for line in performance_lines)
+            elif status == "SKIPPED":
+                output.append(f"   ⏭️ {name} 跳过: {message}")
+            else:
+                output.append(f"   ❌ {name} 失败 ({duration:.2f}s)")
+                
+                # 显示关键错误信息
+                error_lines = message.split('\n')[-3:]  # 最后3行错误
+                for line in error_lines:
+                    line = line.strip()
+                    if line:
+                        output.append(f"   🔍 {line}")
+            
+            results.append({
+                'test_case': test_case,
+                'status': status,
+                'duration_seconds': duration,
+                'stdout': stdout,
+                'stderr': message,
+                'performance_lines': performance_lines,
+                'return_code': return_code,
+                'execution_timestamp': execution_timestamp
+            })
+        print("\n".join(output))
+        
+        return results
+    
+    def _load_benchmark_lines(self, since: str) -> List[str]:
+        """
+        读取性能基准测试写入的指标文件，格式化为性能信息行
+        
+        文件时间戳早于 since（本组用例启动时间）时视为上次运行遗留的结果，忽略。
+        """
+        import json
+        
+        benchmark_file = self.project_root / "tests" / BENCHMARK_FILE
+        try:
+            with open(benchmark_file, encoding='utf-8') as f:
+                metrics = json.load(f)
+            if metrics.get('test_timestamp', '') < since:
+                return []
+            return [
+                f"📊 视频数量: {metrics['video_count']}",
+                f"⏱️  总处理时间: {metrics['total_duration_seconds']:.1f}秒",
+                f"🚀 吞吐量: {metrics['throughput_files_per_minute']:.2f} files/min",
+                f"📈 平均每视频: {metrics['avg_seconds_per_video']:.2f}秒",
+                f"📄 基准报告: {benchmark_file}"
+            ]
+        except (OSError, ValueError, KeyError, TypeError):
+            return []
+    
+    @staticmethod
+    def _parse_junit_results(junit_file: Path) -> Dict[str, Dict[str, Any]]:
+        """解析JUnit XML结果，返回 {"类名::方法名": 用例结果}"""
+        import xml.etree.ElementTree as ET
+        
+        cases = {}
+        if not junit_file.exists():
+            return cases
+        
+        for testcase in ET.parse(junit_file).iter('testcase'):
+            class_name = testcase.get('classname', '').rsplit('.', 1)[-1]
+            problem = testcase.find('failure')
+            if problem is None:
+                problem = testcase.find('error')
+            skipped = testcase.find('skipped')
+            
+            if problem is not None:
+                status = 'FAIL'
+                message = (problem.text or problem.get('message', '')).strip()
+            elif skipped is not None:
+                status = 'SKIPPED'
+                message = skipped.get('message', '')
+            else:
+                status = 'PASS'
+                message = ''
+            
+            cases[f"{class_name}::{testcase.get('name')}"] = {
+                'status': status,
+                'duration': float(testcase.get('time', 0) or 0),
+                'stdout': testcase.findtext('system-out', default=''),
+                'message': message
             }
+        return cases
+    
+    def _compute_stats(self) -> Stats:
+        """单次遍历统计测试结果，缓存后供报告、质量评估和总结复用"""
+        if self._stats is not None:
+            return self._stats
+        
+        stats = Stats()
+        method_flags = stats.method_flags
+        priority_counts = stats.priority_counts
+        insights = stats.performance_insights
+        for r in self.test_results:
+            tc = r['test_case']
+            status = r['status']
+            priority_counts[(tc['priority'], status)] += 1
+            is_performance = 'performance' in tc['method']  # 用例名称为中文，按方法名识别性能测试
+            if is_performance:
+                stats.performance_executed = True
+                stats.longest_performance_duration = max(stats.longest_performance_duration,
+                                                         r['duration_seconds'])
+            
+            if status != 'PASS':
+                stats.failed_cases.append(tc)
+                continue
+            
+            method = tc['method']
+            for key in CORE_FUNCTIONS:
+                if key in method:
+                    method_flags[key] = True
+            
+            # 使用执行阶段已提取的性能输出行
+            lines = r.get('performance_lines', ())
+            if is_performance and any('吞吐量:' in line for line in lines):
+                for line in lines:
+                    for key, insight in PERFORMANCE_KEYS.items():
+                        if key in line:
+                            insights[insight] = line
+                            break
+        
+        # 状态计数由 (优先级, 状态) 计数汇总得到，无需再次遍历结果
+        for (_, status), count in priority_counts.items():
+            stats.status_counts[status] += count
+        self._stats = stats
+        return stats
     
     def _generate_comprehensive_report(self) -> Dict[str, Any]:
         """生成基于真实视频的综合测试报告"""
@@ -200,17 +603,16 @@ class RealVideoQATestRunner:
         total_duration = self.end_time - self.start_time
         
         # 统计结果
-        total_tests = len(self.test_results)
-        passed_tests = len([r for r in self.test_results if r['status'] == 'PASS'])
-        failed_tests = len([r for r in self.test_results if r['status'] == 'FAIL'])
-        error_tests = len([r for r in self.test_results if r['status'] in ['ERROR', 'TIMEOUT']])
+        stats = self._compute_stats()
+        total_tests = stats.total
+        passed_tests = stats.passed
+        failed_tests = stats.failed
+        error_tests = stats.error_timeout
         
-        # 按优先级分析
-        critical_tests = [r for r in self.test_results if r['test_case']['priority'] == 'CRITICAL']
-        high_tests = [r for r in self.test_results if r['test_case']['priority'] == 'HIGH']
+        from datetime import datetime
         
-        critical_passed = len([r for r in critical_tests if r['status'] == 'PASS'])
-        high_passed = len([r for r in high_tests if r['status'] == 'PASS'])
+        # 报告时间戳与文件名共用一次时钟读取
+        generated_at = datetime.now()
         
         # 构建综合报告
         report = {
@@ -219,7 +621,7 @@ class RealVideoQATestRunner:
                     'agent_role': '@qa.mdc',
                     'test_suite': 'real_figma_videos_batch_processing_qa',
                     'video_source': 'test_videos/ - 20个真实Figma教程视频',
-                    'execution_timestamp': datetime.now().isoformat(),
+                    'execution_timestamp': generated_at.isoformat(),
                     'total_duration_seconds': total_duration,
                     'project_root': str(self.project_root),
                     'test_videos_directory': str(self.test_videos_dir)
@@ -227,10 +629,10 @@ class RealVideoQATestRunner:
                 'executive_summary': {
                     'total_tests_executed': total_tests,
                     'overall_pass_rate': passed_tests / total_tests if total_tests > 0 else 0,
-                    'critical_tests_status': f"{critical_passed}/{len(critical_tests)} CRITICAL tests passed",
-                    'high_priority_status': f"{high_passed}/{len(high_tests)} HIGH priority tests passed",
+                    'critical_tests_status': f"{stats.priority_passed('CRITICAL')}/{stats.priority_total('CRITICAL')} CRITICAL tests passed",
+                    'high_priority_status': f"{stats.priority_passed('HIGH')}/{stats.priority_total('HIGH')} HIGH priority tests passed",
                     'overall_verdict': 'PASS' if failed_tests == 0 and error_tests == 0 else 'FAIL',
-                    'ready_for_production': failed_tests == 0 and critical_passed == len(critical_tests)
+                    'ready_for_production': failed_tests == 0 and stats.priority_passed('CRITICAL') == stats.priority_total('CRITICAL')
                 },
                 'detailed_results': {
                     'passed': passed_tests,
@@ -241,99 +643,79 @@ class RealVideoQATestRunner:
                 },
                 'test_breakdown_by_category': self._analyze_by_category(),
                 'performance_insights': self._extract_performance_insights(),
-                'test_execution_details': self.test_results,
+                'test_execution_details': [self._truncate_output(r) for r in self.test_results],
                 'quality_assessment': self._generate_quality_assessment(),
                 'recommendations': self._generate_real_video_recommendations()
             }
         }
         
         # 保存详细报告
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = generated_at.strftime('%Y%m%d_%H%M%S')
         report_file = self.project_root / "tests" / f"real_video_qa_comprehensive_report_{timestamp}.json"
         
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        from tests._json_util import dump_json
+        dump_json(report, report_file)
         
         print(f"\n📄 综合测试报告已保存: {report_file}")
         
         return report
     
+    @staticmethod
+    def _truncate_output(result: Dict[str, Any]) -> Dict[str, Any]:
+        """返回用于报告的结果副本，stdout/stderr 截断为最后 REPORT_OUTPUT_LIMIT 个字符"""
+        if all(len(result[key]) <= REPORT_OUTPUT_LIMIT for key in ('stdout', 'stderr')):
+            return result
+        truncated = dict(result)
+        for key in ('stdout', 'stderr'):
+            if len(truncated[key]) > REPORT_OUTPUT_LIMIT:
+                truncated[key] = truncated[key][-REPORT_OUTPUT_LIMIT:]
+        return truncated
+    
     def _analyze_by_category(self) -> Dict[str, Dict[str, Any]]:
         """按测试类别分析结果"""
-        categories = {}
+        category_tests = defaultdict(list)
+        category_duration = defaultdict(float)
+        status_counts = Counter()  # (类别, 状态) -> 用例数
         
         for result in self.test_results:
-            category = result['test_case']['category']
-            if category not in categories:
-                categories[category] = {
-                    'total': 0,
-                    'passed': 0,
-                    'failed': 0,
-                    'avg_duration': 0,
-                    'tests': []
-                }
-            
-            categories[category]['total'] += 1
-            categories[category]['tests'].append(result['test_case']['name'])
-            
-            if result['status'] == 'PASS':
-                categories[category]['passed'] += 1
-            elif result['status'] == 'FAIL':
-                categories[category]['failed'] += 1
-            
-            categories[category]['avg_duration'] += result['duration_seconds']
+            test_case = result['test_case']
+            category = test_case['category']
+            category_tests[category].append(test_case['name'])
+            category_duration[category] += result['duration_seconds']
+            status_counts[(category, result['status'])] += 1
         
-        # 计算平均时长
-        for category in categories:
-            if categories[category]['total'] > 0:
-                categories[category]['avg_duration'] /= categories[category]['total']
-                categories[category]['pass_rate'] = categories[category]['passed'] / categories[category]['total']
+        categories = {}
+        for category, tests in category_tests.items():
+            total = len(tests)
+            passed = status_counts[(category, 'PASS')]
+            categories[category] = {
+                'total': total,
+                'passed': passed,
+                'failed': status_counts[(category, 'FAIL')],
+                'avg_duration': category_duration[category] / total,
+                'tests': tests,
+                'pass_rate': passed / total
+            }
         
         return categories
     
     def _extract_performance_insights(self) -> Dict[str, Any]:
         """提取性能测试洞察"""
-        performance_results = [r for r in self.test_results 
-                             if 'performance' in r['test_case']['name'].lower()]
-        
-        if not performance_results:
+        stats = self._compute_stats()
+        if not stats.performance_executed:
             return {'status': 'No performance tests executed'}
-        
-        insights = {}
-        for result in performance_results:
-            if result['status'] == 'PASS' and '吞吐量:' in result['stdout']:
-                # 尝试从输出中提取性能数据
-                lines = result['stdout'].split('\n')
-                for line in lines:
-                    if '吞吐量:' in line:
-                        insights['throughput_info'] = line.strip()
-                    elif '总处理时间:' in line:
-                        insights['total_duration_info'] = line.strip()
-                    elif '平均每视频:' in line:
-                        insights['avg_per_video_info'] = line.strip()
-        
-        return insights
+        return dict(stats.performance_insights)
     
     def _generate_quality_assessment(self) -> Dict[str, Any]:
         """生成质量评估"""
-        total_tests = len(self.test_results)
-        passed_tests = len([r for r in self.test_results if r['status'] == 'PASS'])
+        stats = self._compute_stats()
+        total_tests = stats.total
+        passed_tests = stats.passed
         
         # 关键功能测试状态
-        error_isolation_passed = any(
-            r['status'] == 'PASS' and 'error_isolation' in r['test_case']['method']
-            for r in self.test_results
-        )
-        
-        retry_mechanism_passed = any(
-            r['status'] == 'PASS' and 'retry_mechanism' in r['test_case']['method']
-            for r in self.test_results
-        )
-        
-        performance_benchmark_passed = any(
-            r['status'] == 'PASS' and 'performance_benchmark' in r['test_case']['method']
-            for r in self.test_results
-        )
+        error_isolation_passed = stats.method_flags['error_isolation']
+        retry_mechanism_passed = stats.method_flags['retry_mechanism']
+        performance_benchmark_passed = stats.method_flags['performance_benchmark']
         
         # 质量评分 (0-100)
         quality_score = 0
@@ -358,40 +740,33 @@ class RealVideoQATestRunner:
                 'performance_benchmark': 'PASS' if performance_benchmark_passed else 'FAIL'
             },
             'production_readiness': quality_score >= 85,
-            'areas_of_concern': [
-                r['test_case']['name'] for r in self.test_results 
-                if r['status'] != 'PASS'
-            ]
+            'areas_of_concern': [tc['name'] for tc in stats.failed_cases]
         }
     
     def _generate_real_video_recommendations(self) -> List[str]:
         """基于真实视频测试结果生成建议"""
-        recommendations = []
+        stats = self._compute_stats()
         
-        failed_tests = [r for r in self.test_results if r['status'] != 'PASS']
-        
-        if not failed_tests:
-            recommendations.append("🎉 所有真实视频测试通过！批量处理功能完全达标")
-            recommendations.append("✅ 可以安全地用于处理真实的Figma教程视频")
-            recommendations.append("🚀 建议进行生产环境部署")
+        if not stats.failed_cases:
+            recommendations = [
+                "🎉 所有真实视频测试通过！批量处理功能完全达标",
+                "✅ 可以安全地用于处理真实的Figma教程视频",
+                "🚀 建议进行生产环境部署"
+            ]
         else:
-            recommendations.append("⚠️ 发现真实视频测试失败，需要修复")
-            
-            for failed_test in failed_tests:
-                test_name = failed_test['test_case']['name']
-                category = failed_test['test_case']['category']
-                recommendations.append(f"🔍 修复 {category} 类别的 '{test_name}' 测试")
+            recommendations = ["⚠️ 发现真实视频测试失败，需要修复"]
+            recommendations.extend(f"🔍 修复 {tc['category']} 类别的 '{tc['name']}' 测试"
+                                   for tc in stats.failed_cases)
         
         # 性能相关建议
-        performance_tests = [r for r in self.test_results if 'performance' in r['test_case']['name'].lower()]
-        if performance_tests:
-            perf_test = performance_tests[0]
-            if perf_test['duration_seconds'] > 300:  # 超过5分钟
-                recommendations.append("⚡ 考虑优化批量处理性能，当前测试耗时较长")
+        if stats.longest_performance_duration > 300:  # 超过5分钟
+            recommendations.append("⚡ 考虑优化批量处理性能，当前测试耗时较长")
         
         # 基于20个视频文件的建议
-        recommendations.append("📊 当前基准基于20个真实Figma教程视频，可扩展到更大批量")
-        recommendations.append("🎯 建议在真实API环境下进行最终验收测试")
+        recommendations.extend([
+            "📊 当前基准基于20个真实Figma教程视频，可扩展到更大批量",
+            "🎯 建议在真实API环境下进行最终验收测试"
+        ])
         
         return recommendations
     
@@ -401,9 +776,10 @@ class RealVideoQATestRunner:
         print("🎬 基于真实视频的QA测试执行总结")
         print("=" * 70)
         
-        total_tests = len(self.test_results)
-        passed_tests = len([r for r in self.test_results if r['status'] == 'PASS'])
-        failed_tests = len([r for r in self.test_results if r['status'] == 'FAIL'])
+        stats = self._compute_stats()
+        total_tests = stats.total
+        passed_tests = stats.passed
+        failed_tests = stats.failed
         
         print(f"📈 测试统计:")
         print(f"   总计: {total_tests} 个测试")
@@ -413,11 +789,8 @@ class RealVideoQATestRunner:
         print(f"   ⏱️ 总耗时: {self.end_time - self.start_time:.1f}秒")
         
         # 关键测试状态
-        critical_tests = [r for r in self.test_results if r['test_case']['priority'] == 'CRITICAL']
-        critical_passed = len([r for r in critical_tests if r['status'] == 'PASS'])
-        
         print(f"\n🎯 关键测试状态:")
-        print(f"   CRITICAL: {critical_passed}/{len(critical_tests)} 通过")
+        print(f"   CRITICAL: {stats.priority_passed('CRITICAL')}/{stats.priority_total('CRITICAL')} 通过")
         
         # 最终判定
         if failed_tests == 0:
@@ -435,8 +808,8 @@ class RealVideoQATestRunner:
         
         print(f"🧪 验证: 真实视频文件完整性")
         result = subprocess.run([
-            sys.executable, "-m", "pytest", f"tests/{validation_test}", "-v", "-s"
-        ], cwd=self.project_root)
+            sys.executable, "-m", "pytest", f"tests/{validation_test}", "-q", "--tb=line"
+        ], cwd=self.project_root, env=self._pytest_env)
         
         if result.returncode == 0:
             print("✅ 真实视频文件验证通过 - 可以进行完整QA测试")
@@ -448,9 +821,19 @@ class RealVideoQATestRunner:
 
 def main():
     """主执行函数"""
-    runner = RealVideoQATestRunner()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='基于真实视频的批量处理QA测试')
+    parser.add_argument('--quick', action='store_true', help='仅验证真实视频文件')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='并发的pytest子进程数 (默认 min(用例数, CPU核数)；1 表示单进程执行全部用例)')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'复用 tests/{QA_CACHE_FILE} 中视频、测试模块和源码未变化的已通过用例结果')
+    args = parser.parse_args()
+    
+    runner = RealVideoQATestRunner(workers=args.workers, incremental=args.incremental)
     
-    if len(sys.argv) > 1 and sys.argv[1] == "--quick":
+    if args.quick:
         # 快速验证模式
         return runner.run_quick_validation()
     else:
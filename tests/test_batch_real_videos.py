@@ -41,6 +41,8 @@ class TestBatchProcessingWithRealVideos:
         
         # 创建临时输出目录
         self.temp_output_dir = Path(tempfile.mkdtemp())
+        # 每个用例使用独立的状态文件目录，不依赖进程工作目录（QA执行器会并发运行用例）
+        self.state_dir = Path(tempfile.mkdtemp(prefix="batch_state_"))
         
         # 创建真实配置
         config_data = {
@@ -69,11 +71,11 @@ class TestBatchProcessingWithRealVideos:
         """清理测试环境"""
         if self.temp_output_dir.exists():
             shutil.rmtree(self.temp_output_dir)
-        self._cleanup_state_files()
+        shutil.rmtree(self.state_dir, ignore_errors=True)
     
     def _cleanup_state_files(self):
         """清理状态文件"""
-        state_files = list(self.project_root.glob("batch_*_state.json"))
+        state_files = list(self.state_dir.glob("batch_*_state.json"))
         for state_file in state_files:
             try:
                 state_file.unlink()
@@ -106,7 +108,7 @@ class TestBatchProcessingWithRealVideos:
         mock_service_instance.process_video_end_to_end.side_effect = realistic_side_effect
         
         # 执行批量处理
-        processor = SimpleBatchProcessor(self.config)
+        processor = SimpleBatchProcessor(self.config, state_dir=self.state_dir)
         result = processor.process_directory(str(self.test_videos_dir), output_dir=str(self.temp_output_dir))
         
         # 验证结果
@@ -120,10 +122,9 @@ class TestBatchProcessingWithRealVideos:
         assert result["success"] + result["failed"] + result["skipped"] == result["total"]
         
         # 验证状态文件
-        state_files = list(self.project_root.glob("batch_*_state.json"))
-        assert len(state_files) >= 1
+        assert processor.state_file is not None and processor.state_file.exists()
         
-        with open(state_files[0], 'r', encoding='utf-8') as f:
+        with open(processor.state_file, 'r', encoding='utf-8') as f:
             state_data = json.load(f)
         
         assert state_data["total"] == expected_total
@@ -174,7 +175,7 @@ class TestBatchProcessingWithRealVideos:
         # 记录开始时间
         start_time = time.time()
         
-        processor = SimpleBatchProcessor(self.config)
+        processor = SimpleBatchProcessor(self.config, state_dir=self.state_dir)
         result = processor.process_directory(str(test_videos_dir), max_retries=3)
         
         end_time = time.time()
@@ -230,7 +231,7 @@ class TestBatchProcessingWithRealVideos:
             output_file.write_text("已存在的输出内容")
         
         # 执行批量处理（启用跳过已存在文件）
-        processor = SimpleBatchProcessor(self.config)
+        processor = SimpleBatchProcessor(self.config, state_dir=self.state_dir)
         result = processor.process_directory(
             str(test_videos_dir), 
             output_dir=str(self.temp_output_dir),
@@ -244,8 +245,7 @@ class TestBatchProcessingWithRealVideos:
         assert result["failed"] == 0
         
         # 验证状态文件记录正确
-        state_files = list(self.project_root.glob("batch_*_state.json"))
-        with open(state_files[0], 'r', encoding='utf-8') as f:
+        with open(processor.state_file, 'r', encoding='utf-8') as f:
             state_data = json.load(f)
         
         skipped_results = [r for r in state_data["results"] if r["status"] == "skipped"]
@@ -287,7 +287,7 @@ class TestBatchProcessingWithRealVideos:
         
         # 执行性能测试
         start_time = time.time()
-        processor = SimpleBatchProcessor(self.config)
+        processor = SimpleBatchProcessor(self.config, state_dir=self.state_dir)
         result = processor.process_directory(str(self.test_videos_dir), output_dir=str(self.temp_output_dir))
         end_time = time.time()
         